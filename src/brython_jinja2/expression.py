@@ -13,6 +13,13 @@
 # pylint: disable=protected-access; pylint doesn't allow descendants to use parent's protected variables.
 #                                   here they are used extensively by descendants of the ExpNode class.
 
+import keyword
+import re
+import warnings
+import weakref
+
+from collections import OrderedDict
+
 from .context import Context
 from .exceptions import ExpressionError, ExpressionSyntaxError, NoSolution, SkipSubtree
 from .platform import typing
@@ -20,7 +27,6 @@ from .platform.typing import List, Dict, Optional, Tuple, Iterator, Union, NewTy
 from .utils.events import EventMixin
 from .utils.observer import observe
 from .utils.functools import invertible, invert, self_generator
-from .utils import parser_utils as utils
 
 
 ET_EXPRESSION = 0
@@ -50,6 +56,14 @@ T_EQUAL = TokenT(18)
 T_KEYWORD = TokenT(19)          # Warning: This does not include True,False,None; these fall in the T_IDENTIFIER category, also this includes 'in' which can, in certain context, be an operator
 T_UNKNOWN = TokenT(20)
 
+# Tokens after which a '[' starts a list (constant or comprehension)
+# rather than a list slice
+_LBRACKET_OPEN_CTX = frozenset([None, T_OPERATOR, T_LBRACKET_LIST, T_LPAREN_EXPR, T_LPAREN_FUNCTION])
+
+# Tokens after which a '(' starts a parenthesized expression rather
+# than a function call
+_LPAREN_OPEN_CTX = frozenset([None, T_OPERATOR, T_LBRACKET_LIST, T_LBRACKET_INDEX, T_LPAREN_EXPR, T_LPAREN_FUNCTION])
+
 OP_PRIORITY = {
     '(': -2,    # Parenthesis have lowest priority so that we always stop partial evaluation when
                 #  reaching a parenthesis
@@ -74,93 +88,6 @@ OP_PRIORITY = {
 }
 
 
-def token_type(start_chars: str) -> TokenT:
-    """ Identifies the next token type based on the next four characters """
-    # pylint: disable=too-many-boolean-expressions
-    # pylint: disable=too-many-return-statements
-    # pylint: disable=too-many-branches
-    first_char = start_chars[0]
-    if first_char == ' ' or first_char == "\t" or first_char == "\n":
-        return T_SPACE
-    elif first_char == '[':
-        return T_LBRACKET
-    elif first_char == ']':
-        return T_RBRACKET
-    elif first_char == '(':
-        return T_LPAREN
-    elif first_char == ')':
-        return T_RPAREN
-    elif first_char == '{':
-        return T_LBRACE
-    elif first_char == '}':
-        return T_RBRACE
-    elif first_char == '.':
-        return T_DOT
-    elif first_char == ',':
-        return T_COMMA
-    elif first_char == ':':
-        return T_COLON
-    elif first_char == '=' and start_chars[1] != '=':
-        return T_EQUAL
-    elif first_char == "'" or first_char == '"':
-        return T_STRING
-    first_ord = ord(first_char)
-    if first_ord >= 48 and first_ord <= 57:
-        return T_NUMBER
-    len_start = len(start_chars)
-    if len_start >= 2:
-        twochars = start_chars[:2]
-        if first_char in "-+*/<>%" or twochars in ['==', '!=', '<=', '>=']:
-            return T_OPERATOR
-        if len_start >= 3:
-            char_ord = ord(start_chars[2])
-            if (twochars == 'or' or twochars == 'is') and (
-                    char_ord > 122 or char_ord < 65 or char_ord == 91):
-                return T_OPERATOR
-            elif (twochars == 'in' or twochars == 'if') and (char_ord > 122 or char_ord < 65 or char_ord == 91):
-                return T_KEYWORD
-            if len_start >= 4:
-                char_ord = ord(start_chars[3])
-                threechars = start_chars[:3]
-                if (threechars == 'and' or threechars == 'not') and (char_ord > 122 or char_ord < 65 or char_ord == 91):
-                    return T_OPERATOR
-                elif (threechars == 'for') and (char_ord > 122 or char_ord < 65 or char_ord == 91):
-                    return T_KEYWORD
-    if (first_ord >= 65 and first_ord <= 90) or (first_ord >= 97 and first_ord <= 122) or first_char == '_' or first_char == '$':
-        return T_IDENTIFIER
-    else:
-        return T_UNKNOWN
-
-
-def parse_number(expr: str, pos: int) -> Tuple[float, int]:
-    """ Parses a number """
-    # pylint: disable=too-many-nested-blocks
-    if expr[pos] == '-':
-        negative = True
-        pos = pos + 1
-    else:
-        negative = False
-    ret = int(expr[pos]) # type: float
-    pos = pos + 1
-    decimal_part = True
-    div = 10
-    while pos < len(expr) and ((expr[pos] in ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9']) or (decimal_part and expr[pos] == '.')):
-        if expr[pos] == '.':
-            decimal_part = False
-        else:
-            if decimal_part:
-                ret *= 10
-                ret += int(expr[pos])
-            else:
-                ret += int(expr[pos]) / div
-                div = div * 10
-        pos = pos + 1
-    if negative:
-        return -ret, pos
-    else:
-        return ret, pos
-
-
 def parse_string(expr: str, pos: int) -> Tuple[str, int]:
     """ Parses a string, properly interpretting backslashes. """
     end_quote = expr[pos]
@@ -193,21 +120,6 @@ def parse_string(expr: str, pos: int) -> Tuple[str, int]:
     return ret, pos + 1
 
 
-def parse_identifier(expr: str, pos: int):
-    """
-        Parses an identifier. Which should match /[a-z_$0-9]/i
-    """
-    ret = expr[pos]
-    pos = pos + 1
-    while pos < len(expr):
-        char_ord = ord(expr[pos])
-        if not ((char_ord >= 48 and char_ord <= 57) or (char_ord >= 65 and char_ord <= 90) or (char_ord >= 97 and char_ord <= 122) or char_ord == 36 or char_ord == 95):
-            break
-        ret += expr[pos]
-        pos = pos + 1
-    return ret, pos
-
-
 class _TokenStream(Iterable[Tuple[TokenT, Any, int]]):
     def __init__(self, expr):
         self._src = expr
@@ -229,100 +141,137 @@ class _TokenStream(Iterable[Tuple[TokenT, Any, int]]):
 def tokenize(expr: str) -> _TokenStream:
     return _TokenStream(expr)
 
+# Characters after which a word is no longer considered an operator/keyword
+# (e.g. 'or' in 'order' or 'in' in 'int'). Note that '[' and digits do
+# not prevent a word from being a keyword, so 'in[1]' is 'in', '[', '1', ']'.
+_WORD_END = r'(?=[^A-Z\\\]^_`a-z])'
+
+_TOKEN_RE = re.compile(
+    r'(?P<space>[ \t\n]+)'
+    r'|(?P<number>[0-9]+(?:\.[0-9]*)?)'
+    r'|(?P<string>["\'])'
+    r'|(?P<is>is'+_WORD_END+r'(?:[ \t\n]*not(?![0-9A-Za-z]))?)'
+    r'|(?P<opword>(?:or|and|not)'+_WORD_END+r')'
+    r'|(?P<keyword>(?:in|if|for)'+_WORD_END+r')'
+    r'|(?P<operator>\*\*|//|==|<=|>=|!=|[-+*/<>%](?=.))'
+    r'|(?P<equal>=)'
+    r'|(?P<ident>[A-Za-z_$][0-9A-Za-z_$]*)',
+    re.DOTALL
+)
+
+_CHAR_TOKENS = {
+    '[': T_LBRACKET,
+    ']': T_RBRACKET,
+    '(': T_LPAREN,
+    ')': T_RPAREN,
+    '{': T_LBRACE,
+    '}': T_RBRACE,
+    '.': T_DOT,
+    ',': T_COMMA,
+    ':': T_COLON,
+}
+
+
 def _tokenize(self, expr: str) -> Iterator[Tuple[TokenT, Any, int]]:
     """
         A generator which takes a string and converts it to a
         stream of tokens, yielding the triples (token, its value, next position in the string)
         one by one.
-    """
-    # pylint: disable=too-many-branches; python doesn't have a switch statement
-    # pylint: disable=too-many-statements; the length is just due to the many token types
 
+        The tokens are recognized by the precompiled regular expression ``_TOKEN_RE``,
+        single characters which it does not match are looked up in ``_CHAR_TOKENS``
+        (or are :const:`T_UNKNOWN`).
+    """
     self._src = expr
     pos = 0
-    while pos < len(expr):
+    len_expr = len(expr)
+    match = _TOKEN_RE.match
+    while pos < len_expr:
         self._src_pos = pos
-        tokentype = token_type(expr[pos:pos + 4])
-        if tokentype == T_SPACE:
+        token_match = match(expr, pos)
+        if token_match is None:
+            char = expr[pos]
             pos = pos + 1
-        elif tokentype == T_NUMBER:
-            number, pos = parse_number(expr, pos)
-            yield (T_NUMBER, number, pos)
-        elif tokentype == T_STRING:
+            yield (_CHAR_TOKENS.get(char, T_UNKNOWN), char, pos)
+            continue
+        kind = token_match.lastgroup
+        if kind == 'space':
+            pos = token_match.end()
+        elif kind == 'string':
             string, pos = parse_string(expr, pos)
             yield (T_STRING, string, pos)
-        elif tokentype == T_IDENTIFIER:
-            identifier, pos = parse_identifier(expr, pos)
-            yield (T_IDENTIFIER, identifier, pos)
-        elif tokentype == T_OPERATOR:
-            if expr[pos] == '*' and pos+1 < len(expr) and expr[pos+1] == '*':
-                yield (T_OPERATOR, '**', pos+2)
-                pos = pos + 2
-            elif expr[pos] == '/' and pos + 1 < len(expr) and expr[pos + 1] == '/':
-                yield (T_OPERATOR, '//', pos + 2)
-                pos = pos + 2
-            elif expr[pos] == '=' and pos + 1 < len(expr) and expr[pos + 1] == '=':
-                yield (T_OPERATOR, '==', pos + 2)
-                pos = pos + 2
-            elif expr[pos] == '<' and pos + 1 < len(expr) and expr[pos + 1] == '=':
-                yield (T_OPERATOR, '<=', pos + 2)
-                pos = pos + 2
-            elif expr[pos] == '>' and pos + 1 < len(expr) and expr[pos + 1] == '=':
-                yield (T_OPERATOR, '>=', pos + 2)
-                pos = pos + 2
-            elif expr[pos] == '!':
-                yield (T_OPERATOR, '!=', pos + 2)
-                pos = pos + 2
-            elif expr[pos] == 'o':
-                yield (T_OPERATOR, 'or', pos + 2)
-                pos = pos + 2
-            elif expr[pos] == 'i' and expr[pos + 1] == 's':
-                npos = pos + 2
-                len_expr = len(expr)
-                while npos < len_expr and expr[npos] == ' ' or expr[npos] == '\t' or expr[npos] == '\n':
-                    npos += 1
-                if expr[npos:npos + 3] == 'not':
-                    if npos + 3 > len_expr:
-                        yield (T_OPERATOR, 'is not', npos + 3)
-                        pos = npos + 3
-                    else:
-                        char_ord = ord(expr[npos + 3])
-                        if (char_ord < 48 or char_ord > 57) and (char_ord < 65 or char_ord > 90) and (char_ord < 97 or char_ord > 122):
-                            yield (T_OPERATOR, 'is not', npos + 3)
-                            pos = npos + 3
-                        else:
-                            yield (T_OPERATOR, 'is', pos + 2)
-                            pos = pos + 2
+        else:
+            val = token_match.group()
+            pos = token_match.end()
+            if kind == 'ident':
+                yield (T_IDENTIFIER, val, pos)
+            elif kind == 'number':
+                if '.' not in val:
+                    yield (T_NUMBER, int(val), pos)
+                elif val[-1] == '.':
+                    yield (T_NUMBER, int(val[:-1]), pos)
                 else:
-                    yield (T_OPERATOR, 'is', pos + 2)
-                    pos = pos + 2
-            elif expr[pos] == 'a':
-                yield (T_OPERATOR, 'and', pos + 3)
-                pos = pos + 3
-            elif expr[pos] == 'n':
-                yield (T_OPERATOR, 'not', pos + 3)
-                pos = pos + 3
-            else:
-                yield (T_OPERATOR, expr[pos], pos + 1)
-                pos = pos + 1
-        elif tokentype == T_KEYWORD:
-            if expr[pos] == 'f':
-                yield (tokentype, 'for', pos + 3)
-                pos += 3
-            elif expr[pos + 1] == 'f':
-                yield (tokentype, 'if', pos + 2)
-                pos += 2
+                    yield (T_NUMBER, float(val), pos)
+            elif kind == 'keyword':
+                yield (T_KEYWORD, val, pos)
+            elif kind == 'equal':
+                yield (T_EQUAL, val, pos)
+            elif kind == 'is':
+                yield (T_OPERATOR, 'is' if len(val) == 2 else 'is not', pos)
             else:
-                yield (tokentype, 'in', pos + 2)
-                pos += 2
-        else:
-            yield (tokentype, expr[pos], pos + 1)
-            pos = pos + 1
+                yield (T_OPERATOR, val, pos)
+
+
+def _lookup(context: Context, ident: str):
+    """ Looks up the identifier `ident` in `context` falling back to the builtins (see :meth:`IdentNode.evalctx`) """
+    try:
+        return context._get(ident)
+    except KeyError:
+        return IdentNode.BUILTINS[ident]
+
+
+class _SourceMap:
+    """
+        Keeps track of the names used in the source generated by :meth:`ExpNode.to_source`,
+        i.e. values which are passed to the compiled function as globals and the local
+        variables introduced by list comprehensions.
+    """
+
+    def __init__(self):
+        self.globals = {'_lookup': _lookup} # type: Dict[str, Any]
+        self.locals = {}                    # type: Dict[str, str]
+        self._num_locals = 0
+
+    def const(self, val) -> str:
+        """ Returns the name of a global holding the value `val` """
+        name = '_c' + str(len(self.globals))
+        self.globals[name] = val
+        return name
+
+    def local(self, ident: str) -> str:
+        """ Returns a new local variable name which will hold the value of the identifier `ident` """
+        name = '_v' + str(self._num_locals)
+        self._num_locals += 1
+        self.locals[ident] = name
+        return name
+
+
+def _child_source(child: Optional['ExpNode'], varmap: _SourceMap) -> str:
+    if child is None:
+        return 'None'
+    return child.to_source(varmap)
+
+
+def _attr_source(obj_src: str, attr: str) -> str:
+    if attr.isidentifier() and not keyword.iskeyword(attr):
+        return '(' + obj_src + ').' + attr
+    return 'getattr(' + obj_src + ', ' + repr(attr) + ')'
 
 
 T = TypeVar('T', bound='ExpNode')
 class ExpNode(EventMixin):
     """ Base class for nodes in the AST tree """
+    __slots__ = ('_cached_val', '_compiled', '_ctx', '_dirty', 'defined', '__weakref__')
 
     def __init__(self):
         super().__init__()
@@ -345,6 +294,10 @@ class ExpNode(EventMixin):
         # subsequent call to evaluate.
         self._dirty = True
 
+        # The function used by evalctx instead of walking the tree
+        # (see the compile method)
+        self._compiled = None
+
     def _visit(self, visitor, results):
         """
             Calls the function visitor with the `results` list as the first argument and
@@ -420,10 +373,58 @@ class ExpNode(EventMixin):
             ignores any context previously set by the :func:`bind` method and also does
             not update the cache or cache status.
 
+            Note: The first call compiles the node (see :meth:`compile`); the compiled
+            function is then called instead of walking the tree.
+
             Note: The method may throw (e.g. KeyError, AttrAcessError, ...)
         """
+        if self._compiled is None:
+            self.compile()
+        if self._compiled:
+            return self._compiled(context)
+        return self._evalctx(context)
+
+    def _evalctx(self, context: Context):
+        """
+            The tree-walking implementation of :meth:`evalctx`.
+        """
+        raise NotImplementedError
+
+    def to_source(self, varmap: '_SourceMap') -> str:
+        """
+            Returns a python expression (in the variable ``_ctx`` holding the context)
+            which evaluates to the same value as :meth:`evalctx`. Values which can't be
+            written as literals and local variables of list comprehensions are tracked
+            in `varmap`.
+
+            Raises :exc:`NotImplementedError` if the node has no source form.
+        """
         raise NotImplementedError
 
+    def compile(self):
+        """
+            Compiles the subexpression rooted at this node into a single python function
+            which is subsequently used by :meth:`evalctx` instead of walking the tree.
+
+            Returns:
+                the compiled function or ``None`` if some node in the tree does not
+                have a source form (in which case :meth:`evalctx` falls back to walking
+                the tree).
+        """
+        varmap = _SourceMap()
+        try:
+            src = 'lambda _ctx: ' + self.to_source(varmap)
+        except NotImplementedError:
+            # Don't try again on the next call to evalctx
+            self._compiled = False
+            return None
+        with warnings.catch_warnings():
+            # e.g. `1 is None` is a valid expression, python just warns about it
+            warnings.simplefilter('ignore', SyntaxWarning)
+            code = compile(src, '<expr>', 'eval')
+        self._compiled = eval(code, varmap.globals)
+        return self._compiled
+
     @property
     def cache_status(self):
         """
@@ -536,6 +537,7 @@ class ExpNode(EventMixin):
 
 class ConstNode(ExpNode):
     """ Node representing a string or number constant """
+    __slots__ = ()
 
     def __init__(self, val: Union[float, str]) -> None:
         super().__init__()
@@ -551,13 +553,26 @@ class ConstNode(ExpNode):
     def eval(self, force_cache_refresh=False):
         return self._cached_val
 
-    def evalctx(self, context: Context):
+    def _evalctx(self, context: Context):
         return self._cached_val
 
+    def to_source(self, varmap):
+        if type(self._cached_val) in (int, str, bool) or self._cached_val is None:
+            return repr(self._cached_val)
+        return varmap.const(self._cached_val)
+
     def clone(self) -> 'ConstNode':
         # Const Nodes can't change, so clones can be identical
         return self
 
+    def bind(self, event, handler, forward_event=None):
+        # Const Nodes never emit events and are shared between clones,
+        # so we don't keep the handlers around
+        pass
+
+    def unbind(self, event=None, handler=None):
+        pass
+
     def __repr__(self):
         return repr(self._cached_val)
 
@@ -569,6 +584,8 @@ class IdentNode(ExpNode):
     """ Node representing an identifier or one of the predefined constants True, False, None, str, int, len.
         (we don't allow overriding str, int and len)
     """
+    __slots__ = ('_ident', '_const', '_ctx_observer', '_value_observer', '_defined')
+
     CONSTANTS = {
         'True': True,
         'False': False,
@@ -653,7 +670,7 @@ class IdentNode(ExpNode):
             self.defined = True
         return self._cached_val
 
-    def evalctx(self, context):
+    def _evalctx(self, context):
         if not self._const:
             try:
                 return context._get(self._ident)
@@ -662,6 +679,13 @@ class IdentNode(ExpNode):
         else:
             return self._cached_val
 
+    def to_source(self, varmap):
+        if self._ident in varmap.locals:
+            return varmap.locals[self._ident]
+        if self._const:
+            return varmap.const(self._cached_val)
+        return '_lookup(_ctx, ' + repr(self._ident) + ')'
+
     def _assign(self, value):
         if self._const:
             raise ExpressionError("Cannot assign '"+str(value)+"' to the constant" + str(self._cached_val))
@@ -711,6 +735,7 @@ class MultiChildNode(ExpNode):
     """
         Common base class for nodes which have multiple child nodes.
     """
+    __slots__ = ('_children', '_cached_vals', '_dirty_children')
 
     def __init__(self, children):
         super().__init__()
@@ -792,11 +817,11 @@ class MultiChildNode(ExpNode):
         else:
             return self._cached_vals
 
-    def evalctx(self, context):
+    def _evalctx(self, context):
         ret = []
         for child in self._children:
             if child is not None:
-                ret.append(child.evalctx(context))
+                ret.append(child._evalctx(context))
             else:
                 ret.append(None)
         return ret
@@ -837,6 +862,7 @@ class MultiChildNode(ExpNode):
 
 class ListNode(MultiChildNode):
     """ Node representing a list constant, e.g. [1,2,"ahoj",3,None] """
+    __slots__ = ()
 
     def __init__(self, lst):
         super().__init__(lst)
@@ -856,6 +882,9 @@ class ListNode(MultiChildNode):
         else:
             return ListNode(simplified_children)
 
+    def to_source(self, varmap):
+        return '[' + ', '.join(_child_source(ch, varmap) for ch in self._children) + ']'
+
     def solve(self, val, x):
         if not isinstance(val, list) or len(self._children) != len(val):
             raise NoSolution(self, val, x)
@@ -879,6 +908,7 @@ class ListNode(MultiChildNode):
 
 class FuncArgsNode(MultiChildNode):
     """ Node representing the arguments to a function """
+    __slots__ = ('_kwargs', '_cached_kwargs', '_dirty_kwargs')
 
     def __init__(self, args, kwargs):
         super().__init__(args)
@@ -938,13 +968,27 @@ class FuncArgsNode(MultiChildNode):
         self._dirty = False
         return self._cached_val
 
-    def evalctx(self, context):
-        args = super().evalctx(context)
+    def _evalctx(self, context):
+        args = super()._evalctx(context)
         kwargs = {}
         for (arg, val) in self._kwargs.items():
-            kwargs[arg] = val.evalctx(context)
+            kwargs[arg] = val._evalctx(context)
         return args, kwargs
 
+    def to_source(self, varmap):
+        args = ', '.join(_child_source(ch, varmap) for ch in self._children)
+        kwargs = ', '.join(repr(arg) + ': ' + val.to_source(varmap) for (arg, val) in self._kwargs.items())
+        return '([' + args + '], {' + kwargs + '})'
+
+    def args_source(self, varmap: _SourceMap) -> str:
+        """
+            Returns the source of the arguments as they would be written in a function call.
+        """
+        args = [_child_source(ch, varmap) for ch in self._children]
+        if self._kwargs:
+            args.append('**{' + ', '.join(repr(arg) + ': ' + val.to_source(varmap) for (arg, val) in self._kwargs.items()) + '}')
+        return ', '.join(args)
+
     def bind_ctx(self, context):
         super().bind_ctx(context)
         for kwarg in self._kwargs.values():
@@ -986,7 +1030,10 @@ class FuncArgsNode(MultiChildNode):
 
 
 class ConstFuncArgsNode(ExpNode):
+    __slots__ = ('_args', '_kwargs')
+
     def __init__(self, args, kwargs):
+        super().__init__()
         self._args =  args
         self._kwargs = kwargs
 
@@ -999,9 +1046,15 @@ class ConstFuncArgsNode(ExpNode):
     def eval(self, force_cache_refresh=False):
         return self._args, self._kwargs
 
-    def evalctx(self, context):
+    def _evalctx(self, context):
         return self.eval()
 
+    def to_source(self, varmap):
+        return '(' + varmap.const(self._args) + ', ' + varmap.const(self._kwargs) + ')'
+
+    def args_source(self, varmap: _SourceMap) -> str:
+        return '*' + varmap.const(self._args) + ', **' + varmap.const(self._kwargs)
+
     def bind_ctx(self, ctx):
         self._ctx = ctx
 
@@ -1026,6 +1079,7 @@ class ConstFuncArgsNode(ExpNode):
 
 class ListSliceNode(MultiChildNode):
     """ Node representing a slice or an index """
+    __slots__ = ('_slice',)
 
     def __init__(self, is_slice, start, end, step):
         super().__init__([start, end, step])
@@ -1059,14 +1113,30 @@ class ListSliceNode(MultiChildNode):
             self.defined = True
         return self._cached_val
 
-    def evalctx(self, context):
-        # pylint: disable=unbalanced-tuple-unpacking; we know we are a ListSlice so super().evalctx will return three children
-        start, end, step = super().evalctx(context)
+    def _evalctx(self, context):
+        # pylint: disable=unbalanced-tuple-unpacking; we know we are a ListSlice so super()._evalctx will return three children
+        start, end, step = super()._evalctx(context)
         if self._slice:
             return slice(start, end, step)
         else:
             return start
 
+    def to_source(self, varmap):
+        start, end, step = [_child_source(ch, varmap) for ch in self._children]
+        if self._slice:
+            return 'slice(' + start + ', ' + end + ', ' + step + ')'
+        else:
+            return start
+
+    def subscript_source(self, varmap: _SourceMap) -> str:
+        """
+            Returns the source of the slice/index as it would be written in brackets.
+        """
+        if self._slice:
+            return ':'.join('' if ch is None else ch.to_source(varmap) for ch in self._children)
+        else:
+            return self.to_source(varmap)
+
     def __repr__(self):
         start, end, step = self._children
         if self._slice:
@@ -1084,8 +1154,53 @@ class ListSliceNode(MultiChildNode):
             return repr(start)
 
 
+class ConstSliceNode(ListSliceNode):
+    """
+        Node representing a slice or an index whose bounds are all constants
+        (or missing), e.g. ``[1:3]``. The slice object (index) is computed only
+        once, when the node is created.
+    """
+    __slots__ = ()
+
+    def __init__(self, is_slice, start, end, step):
+        super().__init__(is_slice, start, end, step)
+        start, end, step = [None if ch is None else ch.eval() for ch in self._children]
+        if self._slice:
+            self._cached_val = slice(start, end, step)
+        else:
+            self._cached_val = start
+        self._dirty = False
+        self._dirty_children = False
+        self.defined = True
+
+    def is_const(self, assume_const=[]):
+        return True
+
+    def clone(self):
+        # Const Nodes can't change, so clones can be identical
+        return self
+
+    def bind(self, event, handler, forward_event=None):
+        # Const Nodes never emit events and are shared between clones,
+        # so we don't keep the handlers around
+        pass
+
+    def unbind(self, event=None, handler=None):
+        pass
+
+    def bind_ctx(self, context):
+        pass
+
+    def eval(self, force_cache_refresh=False):
+        return self._cached_val
+
+    def _evalctx(self, context):
+        return self._cached_val
+
+
 class AttrAccessNode(ExpNode):
     """ Node representing attribute access, e.g. obj.prop """
+    __slots__ = ('_obj', '_attr', '_observer')
 
     def __init__(self, obj, attribute):
         super().__init__()
@@ -1135,15 +1250,18 @@ class AttrAccessNode(ExpNode):
             self.defined = True
         return self._cached_val
 
-    def evalctx(self, context: Context):
+    def _evalctx(self, context: Context):
         """
            Note that this function expects the AST of the attr access to
            be rooted at the rightmost element of the attr access chain !!
         """
 
-        obj_val = self._obj.evalctx(context)
+        obj_val = self._obj._evalctx(context)
         return getattr(obj_val, self._attr.name())
 
+    def to_source(self, varmap):
+        return _attr_source(self._obj.to_source(varmap), self._attr.name())
+
     def solve(self, val, x: ExpNode):
         if self.equiv(x):
             try:
@@ -1194,6 +1312,7 @@ class AttrAccessNode(ExpNode):
 
 class ListComprNode(ExpNode):
     """ Node representing comprehension, e.g. [ x+10 for x in lst if x//2 == 0 ] """
+    __slots__ = ('_expr', '_var', '_lst', '_cond')
 
     def __init__(self, expr: ExpNode, var: IdentNode, lst: ExpNode, cond: ExpNode) -> None:
         super().__init__()
@@ -1284,18 +1403,28 @@ class ListComprNode(ExpNode):
             self._dirty = False
         return self._cached_val
 
-    def evalctx(self, context: Context):
-        lst = self._lst.evalctx(context)
+    def _evalctx(self, context: Context):
+        lst = self._lst._evalctx(context)
         ret = []
         var_name = self._var.name()
         context._save(var_name)
         for elem in lst:
             context._set(var_name, elem)
-            if self._cond is None or self._cond.evalctx(context):
-                ret.append(self._expr.evalctx(context))
+            if self._cond is None or self._cond._evalctx(context):
+                ret.append(self._expr._evalctx(context))
         context._restore(var_name)
         return ret
 
+    def to_source(self, varmap):
+        lst_src = self._lst.to_source(varmap)
+        saved_locals = dict(varmap.locals)
+        var_src = varmap.local(self._var.name())
+        ret = '[' + self._expr.to_source(varmap) + ' for ' + var_src + ' in ' + lst_src
+        if self._cond is not None:
+            ret += ' if ' + self._cond.to_source(varmap)
+        varmap.locals = saved_locals
+        return ret + ']'
+
     def bind_ctx(self, context: Context):
         super().bind_ctx(context)
         self._lst.bind_ctx(context)
@@ -1325,6 +1454,8 @@ class ListComprNode(ExpNode):
 
 class OpNode(ExpNode):
     """ Node representing an operation, e.g. a is None, a**5, a[10], a.b or func(x,y)"""
+    __slots__ = ('_opstr', '_op', '_larg', '_rarg', '_observer')
+
     UNARY = ['-unary', 'not']
     OPS = {
         '+': lambda x, y: x + y,
@@ -1422,13 +1553,34 @@ class OpNode(ExpNode):
             self._dirty = False
         return self._cached_val
 
-    def evalctx(self, context: Context):
+    def _evalctx(self, context: Context):
         if self._opstr in self.UNARY:
-            return self._op(self._rarg.evalctx(context))
+            return self._op(self._rarg._evalctx(context))
+        elif self._opstr == 'and':
+            # Short-circuit, like the compiled source does
+            left = self._larg._evalctx(context)
+            return left and self._rarg._evalctx(context)
+        elif self._opstr == 'or':
+            left = self._larg._evalctx(context)
+            return left or self._rarg._evalctx(context)
         else:
             return self._op(
-                self._larg.evalctx(context),
-                self._rarg.evalctx(context))
+                self._larg._evalctx(context),
+                self._rarg._evalctx(context))
+
+    def to_source(self, varmap):
+        if self._opstr == '-unary':
+            return '(-' + self._rarg.to_source(varmap) + ')'
+        elif self._opstr == 'not':
+            return '(not ' + self._rarg.to_source(varmap) + ')'
+        elif self._opstr == '[]':
+            if isinstance(self._rarg, ListSliceNode):
+                return '(' + self._larg.to_source(varmap) + ')[' + self._rarg.subscript_source(varmap) + ']'
+            return '(' + self._larg.to_source(varmap) + ')[' + self._rarg.to_source(varmap) + ']'
+        elif self._opstr == '()':
+            return '(' + self._larg.to_source(varmap) + ')(' + self._rarg.args_source(varmap) + ')'
+        else:
+            return '(' + self._larg.to_source(varmap) + ' ' + self._opstr + ' ' + self._rarg.to_source(varmap) + ')'
 
     def call(self, *inject_args, **inject_kwargs):
         """
@@ -1570,6 +1722,10 @@ class OpNode(ExpNode):
 
 
 def simplify(exp: ExpNode) -> ExpNode:
+    """
+        Simplifies the expression `exp` assuming the immutable attributes
+        of its context are constant.
+    """
     if exp._ctx is None:
         return exp.simplify()
     else:
@@ -1670,6 +1826,37 @@ def my_find(haystack, needle, stop_strs):
     pass
 
 
+# Text fragments of interpolated strings; identical fragments
+# share a single (immutable) ConstNode
+_CONST_POOL = weakref.WeakValueDictionary() # type: weakref.WeakValueDictionary
+
+
+def _const_node(text: str) -> ConstNode:
+    """
+        Returns a (possibly shared) :class:`ConstNode` representing ``text``.
+    """
+    node = _CONST_POOL.get(text)
+    if node is None:
+        node = _CONST_POOL[text] = ConstNode(text)
+    return node
+
+
+_DELIM_RE_CACHE = {} # type: Dict[Tuple[str, ...], Any]
+
+
+def _delim_re(start, stop_strs):
+    """
+        Returns a (cached) compiled regexp matching either the string
+        ``start`` or any of the strings in ``stop_strs``. Longer strings
+        are tried first so that, e.g., ``{%-`` wins over ``{%``.
+    """
+    key = (start,)+tuple(stop_strs)
+    if key not in _DELIM_RE_CACHE:
+        needles = sorted(set(key), key=len, reverse=True)
+        _DELIM_RE_CACHE[key] = re.compile('|'.join(map(re.escape, needles)))
+    return _DELIM_RE_CACHE[key]
+
+
 def parse_interpolated_str(tpl_expr, start='{{', end='}}', stop_strs=[]):
     """ Parses a string of the form
 
@@ -1702,32 +1889,37 @@ def parse_interpolated_str(tpl_expr, start='{{', end='}}', stop_strs=[]):
               a valid expression or if one of the expressions is not closed
     """
     last_pos = 0
-    matcher = utils.MultiMatcher([start]+stop_strs)
-    abs_pos, match = matcher.find(tpl_expr)
-    if abs_pos > -1:
-        token_stream = tokenize(tpl_expr[abs_pos + len(match):])
+    delim_re = _delim_re(start, stop_strs)
+    m = delim_re.search(tpl_expr)
+    abs_pos, match = (m.start(), m.group()) if m else (-1, None)
     ret = []
+    end_tokens = [end[0]]
+    end_tail = end[1:]
+    len_end_tail = len(end_tail)
     while abs_pos > -1 and match not in stop_strs:
         if last_pos < abs_pos:
-            ret.append(ConstNode(tpl_expr[last_pos:abs_pos]))                # Get string from the end of the previous expression to the start of the next expression
+            ret.append(_const_node(tpl_expr[last_pos:abs_pos]))              # Get string from the end of the previous expression to the start of the next expression
         abs_pos += len(start)                                                # Skip the opening string (start)
         token_stream = tokenize(tpl_expr[abs_pos:])                          # Tokenize the expression
-        ast, _etok, rel_pos = _parse(token_stream, end_tokens=[str(end[0])])
+        ast, _etok, rel_pos = _parse(token_stream, end_tokens=end_tokens)
         abs_pos += rel_pos                                                   # Skip the first character of the closing string (end)
-        if not tpl_expr[abs_pos:abs_pos+len(end)-1] == end[1:]:
-            raise ExpressionSyntaxError("Invalid interpolated string, expecting '"+str(end[1:])+"'", src=tpl_expr, location=abs_pos)
+        if not tpl_expr[abs_pos:abs_pos+len_end_tail] == end_tail:
+            raise ExpressionSyntaxError("Invalid interpolated string, expecting '"+end_tail+"'", src=tpl_expr, location=abs_pos)
         else:
-            abs_pos += len(end)-1                                            # Skip the rest of the closing string (end)
+            abs_pos += len_end_tail                                          # Skip the rest of the closing string (end)
         ret.append(OpNode("()", IdentNode("str"), FuncArgsNode([ast], {})))  # Wrap the expression in a str call and add it to the list
         last_pos = abs_pos
-        abs_pos, match = matcher.find(tpl_expr, last_pos)
+        m = delim_re.search(tpl_expr, last_pos)
+        abs_pos, match = (m.start(), m.group()) if m else (-1, None)
     if len(tpl_expr) > last_pos and not match in stop_strs:
         abs_pos = len(tpl_expr)
-    ret.append(ConstNode(tpl_expr[last_pos:abs_pos]))
+    ret.append(_const_node(tpl_expr[last_pos:abs_pos]))
     return tpl_expr[:abs_pos], ret
 
 
-_PARSE_CACHE = {} # type: Dict[Tuple[str, bool], Tuple[ExpNode, int]]
+# An LRU cache of parsed expressions, keyed by the arguments to :func:`parse`
+_PARSE_CACHE = OrderedDict() # type: Dict[Tuple[str, bool], Tuple[ExpNode, int]]
+_PARSE_CACHE_SIZE = 1024
 
 
 def parse(expr: str, trailing_garbage_ok: bool=False, use_cache: bool=True) -> Tuple[ExpNode, int]:
@@ -1744,6 +1936,9 @@ def parse(expr: str, trailing_garbage_ok: bool=False, use_cache: bool=True) -> T
         Additionnaly, the method maintains a cache of parsed expressions
         and, unless the ``use_cache`` is set to ``False``, the parsed trees
         are first looked up in this cache  and, if present, a clone is returned.
+        The cache holds at most ``_PARSE_CACHE_SIZE`` expressions (the least
+        recently used ones are dropped first) and can be emptied by calling
+        ``parse.cache_clear()``.
 
         Args:
             expr (str):                    the expression to parse
@@ -1754,16 +1949,125 @@ def parse(expr: str, trailing_garbage_ok: bool=False, use_cache: bool=True) -> T
             tuple(:class:`ExpNode`, int):  The parsed tree and the position where parsing
             stopped.
     """
-    if (expr, trailing_garbage_ok) in _PARSE_CACHE and use_cache:
-        ast, pos = _PARSE_CACHE[(expr, trailing_garbage_ok)]
+    key = (expr, trailing_garbage_ok)
+    if use_cache and key in _PARSE_CACHE:
+        _PARSE_CACHE.move_to_end(key)
+        ast, pos = _PARSE_CACHE[key]
         return ast.clone(), pos
     token_stream = tokenize(expr)
     ast, _etok, pos = _parse(token_stream, trailing_garbage_ok=trailing_garbage_ok)
     if use_cache:
-        _PARSE_CACHE[(expr, True)] = ast, pos
+        # The cached tree is never handed out, so that the caller
+        # can't bind it to a context
+        _PARSE_CACHE[key] = ast, pos
+        if len(_PARSE_CACHE) > _PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+        return ast.clone(), pos
     return ast, pos
 
 
+def _parse_cache_clear():
+    """ Empties the cache used by :func:`parse`. """
+    _PARSE_CACHE.clear()
+
+
+parse.cache_clear = _parse_cache_clear # type: ignore
+
+
+# Handlers for the individual token types used by :func:`_parse`.
+# Each handler is passed the token stream, the argument and operator
+# stacks, the token (and its value) and the previous token. It
+# returns the token which should be considered as the previous token
+# when handling the next one (or ``_UNHANDLED`` if the token is not
+# valid in this position).
+_UNHANDLED = object()
+
+
+def _parse_ident(token_stream, arg_stack, op_stack, token, val, prev_token):
+    arg_stack.append(IdentNode(str(val)))
+    return token
+
+
+def _parse_const(token_stream, arg_stack, op_stack, token, val, prev_token):
+    arg_stack.append(ConstNode(val))
+    return token
+
+
+def _parse_operator(token_stream, arg_stack, op_stack, token, val, prev_token):
+    # NOTE: '.' and 'in' are, in this context, operators.
+    # If the operator has lower priority than operators on the @op_stack
+    # we need to evaluate all pending operations with higher priority
+    if val == '-' and (prev_token == T_OPERATOR or prev_token is None or prev_token == T_LBRACKET_LIST or prev_token == T_LPAREN_EXPR):
+        val = '-unary'
+    pri = OP_PRIORITY[val if val.__class__ is str else str(val)]
+    partial_eval(arg_stack, op_stack, pri, src=token_stream._src, location=token_stream._src_pos)
+    op_stack.append((token, val))
+    return token
+
+
+def _parse_keyword(token_stream, arg_stack, op_stack, token, val, prev_token):
+    # The only keyword which may appear inside an expression is the 'in' operator
+    if val == 'in':
+        return _parse_operator(token_stream, arg_stack, op_stack, token, val, prev_token)
+    return _UNHANDLED
+
+
+def _parse_lbracket(token_stream, arg_stack, op_stack, token, val, prev_token):
+    # '[' can either start a list constant/comprehension, e.g. [1,2,3] or list slice, e.g. ahoj[1:10];
+    # We destinguish between the two cases by noticing that first case must either
+    # be at the start of the expression or be directly preceded by an
+    # operator
+    if prev_token in _LBRACKET_OPEN_CTX:
+        arg_stack.append(parse_lst(token_stream))
+        return T_LBRACKET_LIST
+    is_slice, index_s, index_e, step = parse_slice(token_stream)
+    pri = OP_PRIORITY['[]']
+    partial_eval(arg_stack, op_stack, pri, src=token_stream._src, location=token_stream._src_pos)
+    if all(ch is None or isinstance(ch, ConstNode) for ch in (index_s, index_e, step)):
+        arg_stack.append(ConstSliceNode(is_slice, index_s, index_e, step))
+    else:
+        arg_stack.append(ListSliceNode(is_slice, index_s, index_e, step))
+    op_stack.append((T_OPERATOR, '[]'))
+    return T_LBRACKET_INDEX
+
+
+def _parse_lparen(token_stream, arg_stack, op_stack, token, val, prev_token):
+    # A '(' can either start a parenthesized expression or a function call.
+    # We destinguish between the two cases by noticing that first case must either
+    # be at the start of the expression or be directly preceded by an operator
+    # TODO: Implement Tuples
+    if prev_token in _LPAREN_OPEN_CTX:
+        op_stack.append((T_LPAREN_EXPR, val))
+        return T_LPAREN_EXPR
+    args, kwargs = parse_args(token_stream)
+    pri = OP_PRIORITY['()']
+    partial_eval(arg_stack, op_stack, pri, src=token_stream._src, location=token_stream._src_pos)
+    arg_stack.append(FuncArgsNode(args, kwargs))
+    op_stack.append((T_OPERATOR, '()'))
+    return T_LPAREN_FUNCTION
+
+
+def _parse_rparen(token_stream, arg_stack, op_stack, token, val, prev_token):
+    partial_eval(arg_stack, op_stack, src=token_stream._src, location=token_stream._src_pos)
+    if op_stack[-1][0] != T_LPAREN_EXPR:
+        raise Exception("Expecting '(' at " + str(token_stream._src_pos))
+    op_stack.pop()
+    return token
+
+
+_PARSE_HANDLERS = {
+    T_IDENTIFIER: _parse_ident,
+    T_NUMBER: _parse_const,
+    T_STRING: _parse_const,
+    T_OPERATOR: _parse_operator,
+    T_DOT: _parse_operator,
+    T_KEYWORD: _parse_keyword,
+    T_LBRACKET: _parse_lbracket,
+    T_LPAREN: _parse_lparen,
+    T_RPAREN: _parse_rparen,
+}
+
+
 def _parse(token_stream: _TokenStream, end_tokens=[], trailing_garbage_ok=False, end_token_vals=[]) -> Tuple[ExpNode, Optional[TokenT], int]:
     """
         Parses the `token_stream`, optionally stopping when an
@@ -1782,72 +2086,27 @@ def _parse(token_stream: _TokenStream, end_tokens=[], trailing_garbage_ok=False,
 
         The parser is a simple stack based parser, using a variant
         of the [Shunting Yard Algorithm](https://en.wikipedia.org/wiki/Shunting-yard_algorithm)
+        with the individual tokens handled by the functions in ``_PARSE_HANDLERS``.
     """
     arg_stack = [] # type: List[ExpNode]
     op_stack = []  # type: List[Tuple[TokenT, Any]]
     prev_token = None
-    prev_token_set = False
     save_pos = 0
+    end_tokens_set = set(end_tokens)
+    get_handler = _PARSE_HANDLERS.get
     for (token, val, pos) in token_stream:
-        if token in end_tokens or (type(val) == str and val in end_tokens):  # The token is unconsumed and in the stoplist, so we evaluate what we can and stop parsing
+        if token in end_tokens_set or (val.__class__ is str and val in end_tokens_set):  # The token is unconsumed and in the stoplist, so we evaluate what we can and stop parsing
             partial_eval(arg_stack, op_stack, src=token_stream._src, location=token_stream._src_pos)
             if len(arg_stack) == 0:
                 return None, token, pos
             else:
                 return arg_stack[0], token, pos
-        elif token == T_IDENTIFIER:
-            arg_stack.append(IdentNode(str(val)))
-        elif token in [T_NUMBER, T_STRING]:
-            arg_stack.append(ConstNode(val))
-        elif token == T_OPERATOR or token == T_DOT or (token == T_KEYWORD and val == 'in'):
-            # NOTE: '.' and 'in' are, in this context, operators.
-            # If the operator has lower priority than operators on the @op_stack
-            # we need to evaluate all pending operations with higher priority
-            if val == '-' and (prev_token == T_OPERATOR or prev_token is None or prev_token == T_LBRACKET_LIST or prev_token == T_LPAREN_EXPR):
-                val = '-unary'
-            pri = OP_PRIORITY[str(val)]
-            partial_eval(arg_stack, op_stack, pri, src=token_stream._src, location=token_stream._src_pos)
-            op_stack.append((token, val))
-        elif token == T_LBRACKET:
-            # '[' can either start a list constant/comprehension, e.g. [1,2,3] or list slice, e.g. ahoj[1:10];
-            # We destinguish between the two cases by noticing that first case must either
-            # be at the start of the expression or be directly preceded by an
-            # operator
-            if prev_token == T_OPERATOR or prev_token is None or (
-                    token == T_KEYWORD and val == 'in') or prev_token == T_LBRACKET_LIST or prev_token == T_LPAREN_EXPR or prev_token == T_LPAREN_FUNCTION:
-                arg_stack.append(parse_lst(token_stream))
-                prev_token = T_LBRACKET_LIST
-            else:
-                is_slice, index_s, index_e, step = parse_slice(token_stream)
-                pri = OP_PRIORITY['[]']
-                partial_eval(arg_stack, op_stack, pri, src=token_stream._src, location=token_stream._src_pos)
-                arg_stack.append(ListSliceNode(is_slice, index_s, index_e, step))
-                op_stack.append((T_OPERATOR, '[]'))
-                prev_token = T_LBRACKET_INDEX
-            prev_token_set = True
-        elif token == T_LPAREN:
-            # A '(' can either start a parenthesized expression or a function call.
-            # We destinguish between the two cases by noticing that first case must either
-            # be at the start of the expression or be directly preceded by an operator
-            # TODO: Implement Tuples
-            if prev_token == T_OPERATOR or prev_token is None or (
-                    token == T_KEYWORD and val == 'in') or prev_token == T_LBRACKET_LIST or prev_token == T_LBRACKET_INDEX or prev_token == T_LPAREN_EXPR or prev_token == T_LPAREN_FUNCTION:
-                op_stack.append((T_LPAREN_EXPR, val))
-                prev_token = T_LPAREN_EXPR
-            else:
-                prev_token = T_LPAREN_FUNCTION
-                args, kwargs = parse_args(token_stream)
-                pri = OP_PRIORITY['()']
-                partial_eval(arg_stack, op_stack, pri, src=token_stream._src, location=token_stream._src_pos)
-                arg_stack.append(FuncArgsNode(args, kwargs))
-                op_stack.append((T_OPERATOR, '()'))
-            prev_token_set = True
-        elif token == T_RPAREN:
-            partial_eval(arg_stack, op_stack, src=token_stream._src, location=token_stream._src_pos)
-            if op_stack[-1][0] != T_LPAREN_EXPR:
-                raise Exception("Expecting '(' at " + str(pos))
-            op_stack.pop()
+        handler = get_handler(token)
+        if handler is not None:
+            next_prev_token = handler(token_stream, arg_stack, op_stack, token, val, prev_token)
         else:
+            next_prev_token = _UNHANDLED
+        if next_prev_token is _UNHANDLED:
             if trailing_garbage_ok:
                 partial_eval(arg_stack, op_stack, src=token_stream._src, location=token_stream._src_pos)
                 if len(arg_stack) > 2 or len(op_stack) > 0:
@@ -1855,10 +2114,7 @@ def _parse(token_stream: _TokenStream, end_tokens=[], trailing_garbage_ok=False,
                 return arg_stack[0], None, pos
             else:
                 raise ExpressionSyntaxError("Unexpected token "+str((token, val)), src=token_stream._src, location=token_stream._src_pos)
-        if not prev_token_set:
-            prev_token = token
-        else:
-            prev_token_set = False
+        prev_token = next_prev_token
         save_pos = pos
     partial_eval(arg_stack, op_stack, src=token_stream._src, location=token_stream._src_pos)
     if len(arg_stack) > 2 or len(op_stack) > 0:
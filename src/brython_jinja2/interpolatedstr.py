@@ -3,9 +3,24 @@
     can be used to interpolate complex strings with multiple
     instances of ``{{ }}``-type circular expressions.
 """
+from collections import OrderedDict
+
+from .exceptions import ExpressionError
 from .utils.events import EventMixin
-from .expression import parse_interpolated_str, ConstNode
+from .expression import parse_interpolated_str, ConstNode, ExpNode, _const_node
+from .platform.typing import Dict, List, Set, Tuple
+
 
+# A cache of parsed strings keyed by the arguments passed to
+# :func:`parse_interpolated_str`; holds at most ``_INTERP_CACHE_SIZE``
+# entries, the least recently used ones are dropped first
+_INTERP_CACHE = OrderedDict() # type: Dict[Tuple[str, str, str, Tuple[str, ...]], Tuple[str, List[ExpNode]]]
+_INTERP_CACHE_SIZE = 1024
+
+# Errors which may result from evaluating an expression in an incomplete
+# context (e.g. an undefined variable or an attribute of None); these are
+# rendered as empty strings
+_EVAL_ERRORS = (AttributeError, KeyError, IndexError, TypeError, NameError, ValueError, ArithmeticError, ExpressionError)
 
 
 class InterpolatedStr(EventMixin):
@@ -41,28 +56,56 @@ class InterpolatedStr(EventMixin):
             self.asts = []
             for ast in string.asts:
                 self.asts.append(ast.clone())
+        elif start not in string and not any(stop in string for stop in stop_strs):
+            # Plain text, no need to parse it
+            self._src = string
+            self.asts = [_const_node(string)]
         else:
-            self._src, self.asts = parse_interpolated_str(string, start=start, end=end, stop_strs=stop_strs)
+            key = (string, start, end, tuple(stop_strs))
+            if key in _INTERP_CACHE:
+                _INTERP_CACHE.move_to_end(key)
+            else:
+                _INTERP_CACHE[key] = parse_interpolated_str(string, start=start, end=end, stop_strs=stop_strs)
+                if len(_INTERP_CACHE) > _INTERP_CACHE_SIZE:
+                    _INTERP_CACHE.popitem(last=False)
+            self._src, asts = _INTERP_CACHE[key]
+            self.asts = [ast.clone() for ast in asts]
 
-        for ast_index in range(len(self.asts)):
-            self.asts[ast_index].bind('change', lambda event, ast_index=ast_index: self._change_chandler(event, ast_index))
+        # The value of constant strings is computed once and never changes,
+        # so there is no need to listen for changes
+        self._const = all(ast.is_const() for ast in self.asts)
+
+        # Maps the id of (non-constant) asts to their position in self.asts,
+        # so that the change handler can tell which expression changed
+        self._ast_index = {} # type: Dict[int, int]
+        if not self._const:
+            for ast_index, ast in enumerate(self.asts):
+                if not ast.is_const():
+                    self._ast_index[id(ast)] = ast_index
+                    ast.bind('change', self._change_chandler)
 
         self._dirty = True
         self._dirty_vals = True
-        self._cached_vals = []
+        self._dirty_idx = set() # type: Set[int]
+        self._cached_vals = [] # type: List[str]
         self._cached_val = ""
         self.evaluate()
 
+    @staticmethod
+    def cache_clear():
+        """ Empties the cache of parsed strings shared by all instances. """
+        _INTERP_CACHE.clear()
+
     def is_const(self):
-        for a in self.asts:
-            if not a.is_const():
-                return False
-        return True
+        return self._const
     
     def bind_ctx(self, context):
+        if self._const:
+            return
         for ast in self.asts:
             ast.bind_ctx(context)
         self._dirty = True
+        self._dirty_vals = True
         self._cached_val = ""
 
     def clone(self):
@@ -75,12 +118,10 @@ class InterpolatedStr(EventMixin):
             return self.asts[n]._rarg._children[0]
         
 
-    def _change_chandler(self, event, ast_index):
-        if not self._dirty_vals:
-            if 'value' in event.data:
-                self._cached_vals[ast_index] = event.data['value']
-            else:
-                self._dirty_vals = True
+    def _change_chandler(self, event):
+        # The 'value' reported by the event is not necessarily up to date,
+        # so we just remember which expression needs to be reevaluated
+        self._dirty_idx.add(self._ast_index[id(event.target)])
         if self._dirty:
             return
         self._dirty = True
@@ -88,31 +129,45 @@ class InterpolatedStr(EventMixin):
 
     @property
     def value(self):
+        if self._const:
+            return self._cached_val
         if self._dirty:
-            if self._dirty_vals:
-                self.evaluate()
-            else:
-                self._cached_val = "".join(self._cached_vals)
+            self.evaluate()
         return self._cached_val
 
     def evaluate(self):
-        self._cached_val = ""
-        self._cached_vals = []
-        for ast in self.asts:
+        """
+            Recomputes the value of the string. Unless all the values are
+            dirty (e.g. after binding to a new context), only the expressions
+            which changed since the last evaluation are reevaluated.
+        """
+        asts = self.asts
+        vals = self._cached_vals
+        if self._dirty_vals or len(vals) != len(asts):
+            vals = self._cached_vals = [""]*len(asts)
+            indices = range(len(asts))
+        else:
+            indices = self._dirty_idx
+        for ast_index in indices:
             try:
-                self._cached_vals.append(ast.eval())
-                # pylint: disable=bare-except; interpolated str must handle any exceptions when evaluating circular expressions
-            except:
-                self._cached_vals.append("")
-        self._cached_val = "".join(self._cached_vals)
+                vals[ast_index] = asts[ast_index].eval()
+            except _EVAL_ERRORS:
+                vals[ast_index] = ""
+        self._dirty_idx.clear()
+        self._dirty_vals = False
+        self._cached_val = "".join(vals)
         self._dirty = False
         
     def rstrip(self):
         ret = self.clone()
         if ret.asts:
-            node = self.get_ast(-1, strip_str=True)
+            # ConstNodes are shared between clones (and the cache),
+            # so they are replaced instead of being modified in place
+            node = ret.asts[-1]
             if isinstance(node, ConstNode):
-                node._cached_val = node._cached_val.rstrip()
+                ret.asts[-1] = ConstNode(node.eval().rstrip())
+                ret._dirty_idx.add(len(ret.asts)-1)
+                ret.evaluate()
         return ret
     
     def __str__(self):
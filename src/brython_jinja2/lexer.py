@@ -1,7 +1,14 @@
+import re
+
+from collections import deque
+
 from . import exceptions
-from .platform.typing import Any, Iterable, NewType, Tuple
+from .platform.typing import Any, Iterable, NewType, Optional, Tuple
 from .utils import Location
 
+# Token kinds are plain ints; compare them with ``==`` or use them as
+# dict/set keys, never with ``is`` (int identity is an implementation
+# detail of CPython and does not hold in Brython).
 TokenT = NewType('TokenT', int)
 
 T_BLOCK_START = TokenT(0)
@@ -58,10 +65,18 @@ class TokenStream(Iterable[Tuple[TokenT, Any, Location]]):
         self.loc = Location(src, name=name, filename=fname, pos=0, ln=0, col=0)
         self.token_map = list(tmap)+[(T_SPACE,' ')]
         self.src = src
-        self.left = []
+
+        # A single regexp matching any of the token strings; when several
+        # strings match at a position, the longest one wins (e.g. '<!--' vs '<')
+        tokens = sorted([ts for ts in self.token_map if ts[1]], key=lambda ts: -len(ts[1]))
+        self._token_re = re.compile('|'.join('('+re.escape(string)+')' for _, string in tokens))
+        self._token_ids = [token for token, _ in tokens]
+        self.left = deque()
+        self._remain_src = None # type: Optional[str]
 
     def push_left(self, token, val, pos):
         self.left.append((token, val, pos))
+        self._remain_src = None
 
     def pop_left(self):
         return next(self)
@@ -72,7 +87,9 @@ class TokenStream(Iterable[Tuple[TokenT, Any, Location]]):
     def skip(self, tokens):
         if type(tokens) == int:
             rest = tokens-len(self.left)
-            self.left = self.left[tokens:]
+            for _ in range(min(tokens, len(self.left))):
+                self.left.popleft()
+            self._remain_src = None
             while rest > 0:
                 self.pop_left()
                 rest -= 1
@@ -80,31 +97,36 @@ class TokenStream(Iterable[Tuple[TokenT, Any, Location]]):
             self.cat_while(tokens)
 
     def cat_until(self, tokens):
-        ret = ''
-        toks=[]
+        """
+            Consumes the stream up to (not including) the first token whose type or
+            value is in `tokens` (any container, preferably a frozenset) and returns
+            the consumed source.
+        """
+        ret = []
         for t, val, loc in self:
             if t in tokens or val in tokens:
                 self.push_left(t, val, loc)
-                return ret
+                return ''.join(ret)
             else:
-                toks.append((t,val,loc))
-                ret += val
+                ret.append(val)
         raise exceptions.EOSException("End of stream while looking for TOKENS "+str([token_repr(t) for t in tokens]), src=self.src, location=self.loc)
 
     def cat_while(self, tokens):
-        ret = ''
+        ret = []
         t, val, pos = next(self)
         while t in tokens or val in tokens:
-            ret += val
+            ret.append(val)
             t, val, pos = next(self)
         self.push_left(t, val, pos)
-        return ret
+        return ''.join(ret)
 
     def _next_tok(self, advance=True):
         old_loc = self.loc.clone()
+        if advance:
+            self._remain_src = None
         if len(self.left) > 0:
             if advance:
-                return self.left.pop(0)
+                return self.left.popleft()
             else:
                 return self.left[0]
         if self.loc.pos == len(self.src):
@@ -113,13 +135,14 @@ class TokenStream(Iterable[Tuple[TokenT, Any, Location]]):
             return (T_EOS, '', old_loc)
         elif self.loc.pos > len(self.src):
             raise IndexError
-        for (token, string) in self.token_map:
-            if self.src[self.loc.pos:self.loc.pos+len(string)] == string:
-                if advance:
-                    self.loc._inc_pos(len(string))
-                    if token == T_NEWLINE:
-                        self.loc._newline()
-                return (token, string, old_loc)
+        match = self._token_re.match(self.src, self.loc.pos)
+        if match:
+            token, string = self._token_ids[match.lastindex-1], match.group()
+            if advance:
+                self.loc._inc_pos(len(string))
+                if token == T_NEWLINE:
+                    self.loc._newline()
+            return (token, string, old_loc)
         if advance:
             self.loc._inc_pos()
         return (T_OTHER, self.src[old_loc.pos], old_loc)
@@ -135,7 +158,16 @@ class TokenStream(Iterable[Tuple[TokenT, Any, Location]]):
 
     @property
     def remain_src(self):
-        return ''.join([ t[1] for t in self.left ])+self.src[self.loc.pos:]
+        """
+            The part of the source which was not consumed yet
+            (cached until the stream is advanced or a token is pushed back).
+        """
+        if self._remain_src is None:
+            if self.left:
+                self._remain_src = ''.join([ t[1] for t in self.left ])+self.src[self.loc.pos:]
+            else:
+                self._remain_src = self.src[self.loc.pos:]
+        return self._remain_src
 
 
     def __iter__(self):
@@ -2,49 +2,95 @@ from . import lexer
 from . import templatenodes as nodes
 from . import environment
 from . import exceptions
-from .platform.typing import List, Optional, Tuple
+from .platform.typing import FrozenSet, List, Optional, Tuple
 
 
+# The most common tokens, which always start a Content node
+_CONTENT_TOKENS = frozenset([lexer.T_OTHER, lexer.T_NEWLINE, lexer.T_SPACE])
+
+_EMPTY = frozenset() # type: FrozenSet[str]
+
+# Tokens skipped before (resp. ending) the name of a tag
+_SPACE = frozenset([lexer.T_SPACE])
+_TAG_NAME_STOPS = frozenset([lexer.T_SPACE, lexer.T_BLOCK_END])
+
 
 class Parser:
     def __init__(self, environment: environment.Environment = environment.default_env) -> None:
         self.env = environment
         self.factory = nodes.NodeFactory(self.env)
 
+        # Handlers for the tokens which start a tag/variable/comment (or end the stream);
+        # any other token starts a Content node. A handler returns None if parsing
+        # should continue or the result which _parse should return.
+        self._handlers = {
+            lexer.T_BLOCK_START: self._parse_block,
+            lexer.T_VARIABLE_START: self._parse_variable,
+            lexer.T_COMMENT_START: self._parse_comment,
+            lexer.T_EOS: self._parse_eos,
+        }
+        # The same with tags & comments stripping the preceding node (lstrip_blocks);
+        # _parse picks one of the two, so the handlers need not check the flag
+        self._lstrip_handlers = dict(self._handlers)
+        self._lstrip_handlers[lexer.T_BLOCK_START] = self._lstrip(self._parse_block)
+        self._lstrip_handlers[lexer.T_COMMENT_START] = self._lstrip(self._parse_comment)
+
     def parse(self, source: str, name: str = None, filename: str = None):
         tokenstream = self.env._tokenize(source, name, filename)
         tree, __ = self._parse(tokenstream)
         return tree
 
-    def _parse(self, tokenstream: lexer.TokenStream, end_node_names: List[str] = []) -> Tuple[List[nodes.Node], Optional[str]]:
+    @staticmethod
+    def _lstrip(handler):
+        """
+            Wraps `handler` so that it first strips the whitespace
+            on the right of the last parsed node.
+        """
+        def lstrip_handler(tokenstream, pos, parsed_nodes, end_node_names):
+            if parsed_nodes:
+                parsed_nodes[-1].rstrip()
+            return handler(tokenstream, pos, parsed_nodes, end_node_names)
+        return lstrip_handler
+
+    def _parse_block(self, tokenstream, pos, parsed_nodes, end_node_names):
+        tokenstream.skip(_SPACE)
+        node_name = tokenstream.cat_until(_TAG_NAME_STOPS)
+        if node_name in end_node_names:
+            return parsed_nodes, node_name
+        parsed_nodes.append(self.factory.from_name(self, node_name, tokenstream, location=pos))
+
+    def _parse_variable(self, tokenstream, pos, parsed_nodes, end_node_names):
+        parsed_nodes.append(nodes.Variable(self, tokenstream, location=pos))
+
+    def _parse_comment(self, tokenstream, pos, parsed_nodes, end_node_names):
+        parsed_nodes.append(nodes.Comment(self, tokenstream, location=pos))
+
+    def _parse_eos(self, tokenstream, pos, parsed_nodes, end_node_names):
+        if end_node_names:
+            raise exceptions.EOSException("End of stream reached while looking for"+str(sorted(end_node_names)), location=tokenstream.loc)
+        return parsed_nodes, None
+
+    def _parse(self, tokenstream: lexer.TokenStream, end_node_names: FrozenSet[str] = _EMPTY) -> Tuple[List[nodes.Node], Optional[str]]:
+        """
+            Parses nodes from `tokenstream` until its end or until reaching a tag whose
+            name is in `end_node_names` (a frozenset, typically a module level constant).
+
+            Returns:
+              the list of parsed nodes and the name of the tag which ended parsing (or None)
+        """
         parsed_nodes = [] # type: List[nodes.Node]
+        if self.env.lstrip_blocks:
+            get_handler = self._lstrip_handlers.get
+        else:
+            get_handler = self._handlers.get
         for (token, val, pos) in tokenstream:
-            if token == lexer.T_BLOCK_START:
-                if self.env.lstrip_blocks and parsed_nodes:
-                    parsed_nodes[-1].rstrip()
-                tokenstream.skip([lexer.T_SPACE])
-                node_name = tokenstream.cat_until([lexer.T_SPACE, lexer.T_BLOCK_END])
-                if node_name in end_node_names:
-                    return parsed_nodes, node_name
-                node = self.factory.from_name(self, node_name, tokenstream, location=pos)
-                parsed_nodes.append(node)
-            elif token == lexer.T_VARIABLE_START:
-                node = nodes.Variable(self, tokenstream, location=pos)
-                parsed_nodes.append(node)
-            elif token == lexer.T_COMMENT_START:
-                if self.env.lstrip_blocks and parsed_nodes:
-                    parsed_nodes[-1].rstrip()
-                node = nodes.Comment(self, tokenstream, location=pos)
-                parsed_nodes.append(node)
-            elif token == lexer.T_EOS:
-                if end_node_names:
-                    raise exceptions.EOSException("End of stream reached while looking for"+str(end_node_names), location=tokenstream.loc)
-                return parsed_nodes, None
-            else:
+            handler = None if token in _CONTENT_TOKENS else get_handler(token)
+            if handler is None:
                 tokenstream.push_left(token, val, pos )
                 node = nodes.Content(self, tokenstream, location=pos)
                 parsed_nodes.append(node)
+            else:
+                ret = handler(tokenstream, pos, parsed_nodes, end_node_names)
+                if ret is not None:
+                    return ret
         return parsed_nodes, None
-
-
-
@@ -2,6 +2,9 @@ from browser import document, window, html
 
 html.ROOT = html.maketag('ROOT') # type: ignore
 
+# Attributes whose values are space separated lists
+_MULTI_VALUED_ATTRS = frozenset(['class', 'rev', 'accept-charset', 'headers', 'accesskey'])
+
 def dom_from_html(html):
     """
         Creates a DOM structure from :param:`html`. The dom structure is
@@ -99,12 +102,21 @@ class NavigableString(PageElement):
 class Attrs:
     def __init__(self, elt):
         self.elt = elt
+        # The NamedNodeMap of the DOM element is live, so it can be
+        # fetched (across the JS bridge) just once
+        self._attributes = elt._elt.attributes
 
     def keys(self):
-        return [a.name for a in self.elt.attributes]
+        return (a.name for a in self._attributes)
 
     def items(self):
-        return [(a.name,a.value) for a in self.elt.attributes]
+        return ((a.name, a.value) for a in self._attributes)
+
+    def __iter__(self):
+        return self.keys()
+
+    def __len__(self):
+        return self._attributes.length
 
     def __setitem__(self, key, value):
         self.elt[key] = value
@@ -119,8 +131,10 @@ class Tag(PageElement):
         self._elt = element_or_html
         if self._elt.nodeType == self._elt.ELEMENT_NODE:
             self.name = self._elt.tagName
+            self._name_upper = self.name.upper()
         else:
             self.name  = None
+            self._name_upper = None
 
     def get(self, key):
         return self._elt.getAttribute(key)
@@ -142,10 +156,21 @@ class Tag(PageElement):
 
     @property
     def descendants(self):
-        for ch in self.children:
-            yield ch
-            for d in ch.descendants:
-                yield d
+        # Iterative depth-first traversal, the stack holds the next
+        # siblings of the elements whose children are being traversed
+        stack = []
+        elt = self._elt.firstChild
+        while elt is not None:
+            wrapped = from_native_element(elt)
+            if wrapped is not None:
+                yield wrapped
+            if elt.firstChild is not None:
+                stack.append(elt.nextSibling)
+                elt = elt.firstChild
+            else:
+                elt = elt.nextSibling
+            while elt is None and stack:
+                elt = stack.pop()
 
     def extract(self) -> PageElement:
         if self.parent:
@@ -172,24 +197,24 @@ class Tag(PageElement):
         self._elt.remove()
 
     def __getitem__(self, key):
-        if key == 'value' and self.name.upper()=='INPUT':
+        if key == 'value' and self._name_upper == 'INPUT':
             return self._elt.value
         ret = self._elt.getAttribute(key)
         if ret is None:
             raise KeyError(key)
         else:
-            if key in ['class', 'rev', 'accept-charset', 'headers', 'accesskey']:
+            if key in _MULTI_VALUED_ATTRS:
                 ret = ret.split(' ')
                 if len(ret) == 1:
                     ret = ret[0]
             return ret
 
     def __setitem__(self, key, value):
-        if key == 'value' and self.name.upper()=='INPUT':
+        if key == 'value' and self._name_upper == 'INPUT':
             return self._elt.set_value(value)
 
         if isinstance(value, list):
-            value = ' '.join(list)
+            value = ' '.join(value)
         self._elt.setAttribute(key, value)
 
 
@@ -218,7 +243,7 @@ class Document:
         if isinstance(filter, list):
             filter = ','.join(filter)
         if isinstance(filter, str):
-            ret = self[str+attr_selector]
+            ret = self[filter+attr_selector]
             if limit > 0:
                 ret = ret[:limit]
         elif callable(filter):
@@ -226,7 +251,7 @@ class Document:
                 if filter(tag):
                     ret.append(tag)
                     count += 1
-                if limit > 0 and count > limit:
+                if limit > 0 and count >= limit:
                     break
         return ret
 
@@ -237,17 +262,17 @@ class Document:
         if kwargs:
             for (attr, val) in kwargs.items():
                 attr_selector += '['+attr+'='+str(val)+']'
-        if isinstance(filter, list):
-            filter = ','.join(filter)
-        if isinstance(filter, str):
-            ret = window.document.querySelector(str)
+        if isinstance(name, list):
+            name = ','.join(name)
+        if isinstance(name, str):
+            ret = window.document.querySelector(name+attr_selector)
             if ret is None:
                 return None
             else:
                 return Tag(ret)
-        elif callable(filter):
+        elif callable(name):
             for tag in self[attr_selector]:
-                if filter(tag):
+                if name(tag):
                     return tag
         return None
 
@@ -262,11 +287,18 @@ class Document:
 
     @property
     def descendants(self):
-        for ch in self._elt.children:
-            t = Tag(ch)
-            yield t
-            for d in t.descendants:
-                yield d
+        # Same as Tag.descendants, except that only elements are traversed
+        stack = []
+        elt = window.document.firstElementChild
+        while elt is not None:
+            yield Tag(elt)
+            if elt.firstElementChild is not None:
+                stack.append(elt.nextElementSibling)
+                elt = elt.firstElementChild
+            else:
+                elt = elt.nextElementSibling
+            while elt is None and stack:
+                elt = stack.pop()
 
     def select(self, selector):
         return self[selector]
@@ -21,6 +21,30 @@ class Union(DummyParametrizedType):
 class Iterable(DummyParametrizedType):
     pass
 
+class Iterator(DummyParametrizedType):
+    pass
+
+class Dict(DummyParametrizedType):
+    pass
+
+class Set(DummyParametrizedType):
+    pass
+
+class Mapping(DummyParametrizedType):
+    pass
+
+class Callable(DummyParametrizedType):
+    pass
+
+class FrozenSet(DummyParametrizedType):
+    pass
+
+class Deque(DummyParametrizedType):
+    pass
+
+class Sequence(DummyParametrizedType):
+    pass
+
 def NewType(self, name, tp):
     return tp
 
@@ -1,3 +1,7 @@
+import re
+
+from collections import deque
+
 from . import environment
 from . import exceptions
 from . import expression
@@ -6,22 +10,47 @@ from . import lexer
 from .context import Context
 from .platform import bs4
 from .platform import typing
-from .platform.typing import List, Dict, Optional, Tuple, Iterable, Callable, Mapping, Union
+from .platform.typing import Deque, List, Dict, Sequence, Optional, Tuple, Iterable, Callable, Mapping, Union
 from .utils.delayedupdater import DelayedUpdater
 
 
 _NODE_BEGIN_MARKER='data-jinja-tpl-node-'
 _NODE_END_MARKER='_'
+_ID_RE = re.compile(re.escape(_NODE_BEGIN_MARKER)+r'(\d+)'+re.escape(_NODE_END_MARKER))
+
+# Tags ending the body of an if (resp. else) branch
+_IF_ENDS = frozenset(['else', 'elif', 'endif'])
+_ENDIF = frozenset(['endif'])
+
+# Tokens ending a Content (resp. Comment) node
+_CONTENT_STOPS = frozenset([lexer.T_BLOCK_START, lexer.T_VARIABLE_START, lexer.T_COMMENT_START, lexer.T_EOS])
+_COMMENT_STOPS = frozenset([lexer.T_COMMENT_END])
+
+
+# Shared (immutable) children/rendered elements of nodes which have none
+_EMPTY = () # type: Tuple
+
+
+def _is_plain_text(html: str) -> bool:
+    """
+        Returns True if :param:`html` contains no markup (tags, entities),
+        i.e. if it would be parsed into a single text node.
+    """
+    return '<' not in html and '&' not in html
 
 
 class Node(DelayedUpdater):
+    __slots__ = ('_location', '_children', '_rendered', '_ctx')
+
     def __init__(self, parser, token_stream: lexer.TokenStream, location: Optional[lexer.Location] = None) -> None:
+        super().__init__()
         if location is None:
             self._location = lexer.Location()
         else:
             self._location = location
-        self._children = [] # type: List[Node]
-        self._rendered = [] # type: List[bs4.PageElement]
+        # Most nodes never get children, so they share an empty tuple
+        self._children = _EMPTY # type: Sequence[Node]
+        self._rendered = _EMPTY # type: Sequence[bs4.PageElement]
         self._ctx = Context()
 
     @classmethod
@@ -30,16 +59,33 @@ class Node(DelayedUpdater):
 
     @classmethod
     def _extract_id(cls, text: str) -> int:
-        return int(text.rstrip(_NODE_END_MARKER).lstrip(_NODE_BEGIN_MARKER))
+        return int(_ID_RE.search(text).group(1))
+
 
+    def _get_html_segments(self) -> List[Tuple[Optional[str], Optional[int]]]:
+        """
+            Returns the html content of the node split into segments, each either
+            ``(html, None)`` (static html) or ``(None, num)`` (the placeholder
+            for the num-th child). This is :meth:`_get_html_content` before
+            it is serialized.
+        """
+        return [(None, num) for num in range(len(self._children))]
 
     def _get_html_content(self):
-        html = ""
-        for num, ch in enumerate(self._children):
-            html+=ch._html_ref(num)
-        return html
+        return ''.join([self._html_ref(num) if html is None else html for html, num in self._get_html_segments()])
 
     def render_dom(self) -> List[bs4.Tag]:
+        segments = self._get_html_segments()
+        if all(html is None or _is_plain_text(html) for html, _ in segments):
+            # The static html is just text, so there is no need to go
+            # through the DOM to find out where to put the children
+            self._rendered = []
+            for html, num in segments:
+                if html is None:
+                    self._rendered.extend(self._children[num].render_dom())
+                elif html:
+                    self._rendered.append(bs4.NavigableString(html))
+            return self._rendered
         root = bs4.dom_from_html(self._get_html_content())
         t_el = _TemplatedTag(root, {i:ch for i,ch in enumerate(self._children)})
         self._rendered = [ch.extract() for ch in t_el.children]
@@ -82,10 +128,11 @@ class Node(DelayedUpdater):
             Returns:
               expression.Node: The root node of the AST representing the parsed expression
         """
-        exp_tokens = expression.tokenize(token_stream.remain_src)
+        remain_src = token_stream.remain_src
+        exp_tokens = expression.tokenize(remain_src)
         ast, _etok, pos = expression._parse(exp_tokens, end_tokens = [end_str[0]])
-        if not token_stream.remain_src[pos:pos+len(end_str)-1] == end_str[1:]:
-            raise exceptions.ExpressionSyntaxError("Invalid argument string, expecting '"+str(end_str)+"', found '"+end_str[0]+token_stream.remain_src[pos:pos+len(end_str)-1]+"' instead.", src=token_stream.remain_src, location=pos)
+        if not remain_src.startswith(end_str[1:], pos):
+            raise exceptions.ExpressionSyntaxError("Invalid argument string, expecting '"+str(end_str)+"', found '"+end_str[0]+remain_src[pos:pos+len(end_str)-1]+"' instead.", src=remain_src, location=pos)
         token_stream.skip(pos+len(end_str)-2)
         return ast
 
@@ -103,11 +150,14 @@ class NodeFactory:
     def __init__(self, env: environment.Environment) -> None:
         self.env = env
         self.active = { k:v for k,v in self.AVAILABLE.items() if k not in env.disabled_tags}
+        self._lookup = self.active.__getitem__
 
     def from_name(self, parser, name: str, tokenstream: lexer.TokenStream, location: lexer.Location) -> Node:
-        if name not in self.active:
-            raise exceptions.TemplateSyntaxError("Unknown (or disabled) tag: "+name, src=tokenstream.src, location=location)
-        return self.active[name](parser, tokenstream, location)
+        try:
+            node_cls = self._lookup(name)
+        except KeyError:
+            raise exceptions.TemplateSyntaxError("Unknown (or disabled) tag: "+name, src=tokenstream.src, location=location) from None
+        return node_cls(parser, tokenstream, location)
 
 def register_node(NodeName: str) -> Callable[[type], type]:
     def decorator(cls: type) -> type:
@@ -117,19 +167,46 @@ def register_node(NodeName: str) -> Callable[[type], type]:
 
 class _TemplatedTag(bs4.PageElement):
     def __init__(self, elt: bs4.Tag, node_map: Mapping[int, Node]) -> None:
+        self._init_tag(elt)
+        # The subtree is processed breadth-first using a work queue
+        # (instead of recursion) of (templated tag, source element) pairs
+        work = deque([(self, elt)])
+        # Without child nodes there are no markers to look for
+        has_markers = bool(node_map)
+        while work:
+            tag, src_elt = work.popleft()
+            tag._fill(src_elt, node_map, work, has_markers)
+
+    def _init_tag(self, elt: bs4.Tag) -> None:
         self._elt = bs4.Tag(elt.name)
         self._dynamic_attrs = [] # type: List[DynamicAttr]
+
+    def _fill(self, elt: bs4.Tag, node_map: Mapping[int, Node], work: Deque[Tuple['_TemplatedTag', bs4.Tag]], has_markers: bool = True) -> None:
+        """
+            Fills in the children and dynamic attributes of the tag from `elt`.
+            The templated child tags are created empty and queued onto `work`.
+            If `has_markers` is False, the text and attributes are not scanned
+            for node markers.
+        """
         for ch in elt.children:
-            if isinstance(ch, bs4.NavigableString):
-                pieces = ch.text.split(_NODE_BEGIN_MARKER)
+            if isinstance(ch, bs4.NavigableString) and not has_markers:
+                self.append(bs4.NavigableString(ch.text))
+            elif isinstance(ch, bs4.NavigableString):
+                # pieces = [text, id, text, id, ..., text]
+                pieces = _ID_RE.split(ch.text)
                 self.append(bs4.NavigableString(pieces[0]))
-                for p in pieces[1:]:
-                    id, rest = p.split(_NODE_END_MARKER)
-                    for el in node_map[int(id)].render_dom():
+                for pos in range(1, len(pieces), 2):
+                    for el in node_map[int(pieces[pos])].render_dom():
                         self.append(el)
-                    self.append(bs4.NavigableString(rest))
+                    self.append(bs4.NavigableString(pieces[pos+1]))
             elif isinstance(ch, bs4.Tag):
-                self.append(_TemplatedTag(ch, node_map))
+                child = _TemplatedTag.__new__(_TemplatedTag)
+                child._init_tag(ch)
+                self.append(child)
+                work.append((child, ch))
+
+        if not has_markers:
+            return
 
         for name, val in self.attrs.items():
             if _NODE_BEGIN_MARKER in name:
@@ -138,14 +215,17 @@ class _TemplatedTag(bs4.PageElement):
                 id = Node._extract_id(name)
                 self._dynamic_attrs.append(_TemplatedAttr(self, node_map[id]))
             elif _NODE_BEGIN_MARKER in val:
-                id = Node._extract_id(val)
                 self._dynamic_attrs.append(_TemplatedValAttr(self, name, val, node_map))
 
 class DynamicAttr:
+    __slots__ = ('_elt',)
+
     def __init__(self, elt: bs4.Tag) -> None:
         self._elt = elt
 
 class _TemplatedValAttr(DynamicAttr):
+    __slots__ = ('_name', '_components')
+
     def __init__(self, elt: bs4.Tag, name: str, value: str, nodes: Mapping[int, Node]) -> None:
         super().__init__(elt)
         self._name = name
@@ -154,7 +234,9 @@ class _TemplatedValAttr(DynamicAttr):
         if pieces[0]:
             self._components.append(pieces[0])
         for p in pieces[1:]:
-            id, rest = p.split(_NODE_END_MARKER)
+            # partition stops at the first marker end, so the rest of
+            # the value may contain further underscores
+            id, _, rest = p.partition(_NODE_END_MARKER)
             node = nodes[int(id)]
             self._components.append(node)
             if rest:
@@ -162,6 +244,8 @@ class _TemplatedValAttr(DynamicAttr):
 
 
 class _TemplatedAttr(DynamicAttr):
+    __slots__ = ('_node',)
+
     def __init__(self, elt: bs4.Tag, node: Node) -> None:
         super().__init__(elt)
         self._node = node
@@ -175,19 +259,29 @@ class _TemplatedText(bs4.NavigableString):
 
 
 class Comment(Node):
+    __slots__ = ('_content',)
+
     def __init__(self, parser, token_stream: lexer.TokenStream, location=None) -> None:
         super().__init__(parser, token_stream, location)
-        self._content = token_stream.cat_until([lexer.T_COMMENT_END])
+        self._content = token_stream.cat_until(_COMMENT_STOPS)
+
+    def _get_html_segments(self):
+        return []
 
     def _get_html_content(self):
         return ""
 
 class Variable(Node):
+    __slots__ = ('_content',)
+
     def __init__(self, parser, token_stream: lexer.TokenStream, location=None) -> None:
         super().__init__(parser, token_stream, location)
         e_str = parser.env.variable_end_string
         self._content = self.parse_args(token_stream, e_str)
 
+    def _get_html_segments(self):
+        return []
+
     def _get_html_content(self):
         return ""
 
@@ -203,22 +297,27 @@ class Variable(Node):
         if self.safe:
             self._rendered = bs4.dom_from_html(self._content.value)
         else:
-            self._rendered = _TemplatedText(self)
+            self._rendered = [_TemplatedText(self)]
         return self._rendered
 
     def render_text(self):
         return self._content.value
 
 class Content(Node):
+    __slots__ = ('_content',)
+
     def __init__(self, parser, token_stream: lexer.TokenStream, location) -> None:
         super().__init__(parser, token_stream, location)
-        self._content = token_stream.cat_until([lexer.T_BLOCK_START, lexer.T_VARIABLE_START, lexer.T_COMMENT_START, lexer.T_EOS])
+        self._content = token_stream.cat_until(_CONTENT_STOPS)
+
+    def _get_html_segments(self):
+        return [(self._content, None)]
 
     def _get_html_content(self):
         return self._content
 
     def render_dom(self):
-        return bs4.NavigableString(self._content)
+        return [bs4.NavigableString(self._content)]
 
     def render_text(self):
         return self._content
@@ -254,36 +353,52 @@ class IfNode(Node):
         {% endif %}
 
     """
+    __slots__ = ('_cases',)
+
     def __init__(self, parser, token_stream, location=None) -> None:
         super().__init__(parser, token_stream, location)
         self._cases = [] # type: List[Tuple[expression.ExpNode, List[Node]]]
-        cond = self.parse_args(token_stream, end_str=parser.env.block_end_string)
-        body, end_node = parser._parse(token_stream, end_node_names=['else', 'elif', 'endif'])
+        block_end = parser.env.block_end_string
+        cond = self.parse_args(token_stream, end_str=block_end)
+        body, end_node = parser._parse(token_stream, end_node_names=_IF_ENDS)
         self._cases.append((cond, body))
         while end_node == 'elif':
-            cond = self.parse_args(token_stream, end_str=parser.env.block_end_string)
-            body, end_node = parser._parse(token_stream, end_node_names=['else', 'elif', 'endif'])
+            cond = self.parse_args(token_stream, end_str=block_end)
+            body, end_node = parser._parse(token_stream, end_node_names=_IF_ENDS)
             self._cases.append((cond, body))
         if end_node == 'else':
-            token_stream.cat_until([parser.env.block_end_string])
-            token_stream.skip(1)
+            self._skip_block_end(token_stream, block_end)
             cond = expression.ConstNode(True)
-            body, end_node = parser._parse(token_stream, end_node_names=['endif'])
+            body, end_node = parser._parse(token_stream, end_node_names=_ENDIF)
             self._cases.append((cond, body))
-        token_stream.cat_until([parser.env.block_end_string])
-        token_stream.skip(len(parser.env.block_end_string))
+        self._skip_block_end(token_stream, block_end)
+
+    @classmethod
+    def _skip_block_end(cls, token_stream: lexer.TokenStream, block_end: str) -> None:
+        """
+            Advances `token_stream` past the end of the current tag (the `block_end`
+            token); anything between the tag name and the `block_end` is ignored.
+        """
+        token_stream.cat_until([block_end])
+        token_stream.skip(1)
 
 @register_node('else')
 class ElseNode(Node):
+    __slots__ = ()
+
     def __init__(self, parser, token_stream, location) -> None:
         raise exceptions.TemplateSyntaxError("Unexpected else tag (did you put more than one else tag inside an if?)", src=token_stream.src, location=location)
 
 @register_node('elif')
 class ElifNode(Node):
+    __slots__ = ()
+
     def __init__(self, parser, token_stream, location) -> None:
         raise exceptions.TemplateSyntaxError("Unexpected elif tag (did you put the elif after the else?)", src=token_stream.src, location=location)
 
 @register_node('endif')
 class EndifNode(Node):
+    __slots__ = ()
+
     def __init__(self, parser, token_stream, location) -> None:
         raise exceptions.TemplateSyntaxError("Unexpected endif tag (not in the scope of an if tag)", src=token_stream.src, location=location)
@@ -1,20 +1,35 @@
 """
     Miscellaneous utility classes and functions.
 """
+import re
+
+from bisect import bisect_left
+
+_NEWLINE_RE = re.compile('\n')
+
+# The last source passed to _newline_offsets together with its newline offsets
+# (locations are usually computed repeatedly for the same source)
+_NEWLINES_CACHE = [None, []]
+
+def _newline_offsets(src):
+    """
+        Returns the (sorted) list of positions of newlines in :param:`src`.
+    """
+    if _NEWLINES_CACHE[0] is not src:
+        _NEWLINES_CACHE[:] = [src, [m.start() for m in _NEWLINE_RE.finditer(src)]]
+    return _NEWLINES_CACHE[1]
 
 
 class Location:
-    
+    __slots__ = ('_src', '_name', '_fname', '_ln', '_col', '_pos')
+
     @classmethod
     def location_from_pos(cls, src, pos, name=None, filename=None):
-        loc = Location(src, name=name, filename=filename, ln=0, col=0, pos=0)
-        for c in src:
-            loc._inc_pos()
-            if c == '\n':
-                loc._newline()
-            if loc.pos >= pos:
-                break
-        return loc
+        pos = max(0, min(pos, len(src)))
+        newlines = _newline_offsets(src)
+        ln = bisect_left(newlines, pos)
+        col = pos - (newlines[ln-1]+1 if ln else 0)
+        return Location(src, name=name, filename=filename, ln=ln, col=col, pos=pos)
         
     def __init__(self, src='', name=None, filename=None, ln=0, col=0, pos=0):
         self._src = src
@@ -23,7 +38,7 @@ class Location:
         self._ln = ln
         self._col = col
         self._pos = pos
-        
+
     @property
     def line(self):
         return self._ln
@@ -51,20 +66,30 @@ class Location:
         ln = self.line
         col = self.column
         
-        # Get the Context
-        src_lines = self._src.split('\n')
-        
+        src = self._src
+
         # If there is just a single line, don't bother with line numbers and context lines
-        if len(src_lines) < 2:
-            return ["src: "+self._src,"     "+" "*col+"^"]
-        
-        start_ctx = max(ln-num_ctx_lines,0)
-        end_ctx = min(ln+num_ctx_lines+1,len(src_lines))
-        prev_lines = src_lines[start_ctx:ln]
-        post_lines = src_lines[ln+1:end_ctx]
-        
+        if '\n' not in src:
+            return ["src: "+src,"     "+" "*col+"^"]
+
+        # Get the Context; only the lines in the window around the current
+        # line are split off the source
+        newlines = _newline_offsets(src)
+        cur_line = min(ln, len(newlines))
+        first_line = max(cur_line-num_ctx_lines, 0)
+        last_line = min(cur_line+num_ctx_lines, len(newlines))
+        start = newlines[first_line-1]+1 if first_line else 0
+        end = newlines[last_line] if last_line < len(newlines) else len(src)
+        src_lines = src[start:end].split('\n')
+        cur_idx = cur_line-first_line
+
+        start_ctx = ln-cur_idx
+        end_ctx = start_ctx+len(src_lines)
+        prev_lines = src_lines[:cur_idx]
+        post_lines = src_lines[cur_idx+1:]
+
         # Get the current line with a caret indicating the column
-        cur_lines = ['', src_lines[ln], " "*col+"^"]
+        cur_lines = ['', src_lines[cur_idx], " "*col+"^"]
 
         
         # Prepend line numbers & current line marker
@@ -76,7 +101,7 @@ class Location:
         cur_lines[2] = '  '+''.ljust(line_num_len) + cur_lines[2]
 
         for i in range(len(post_lines)):
-            post_lines[i] = '  '+str(ln+i).ljust(line_num_len+2) + post_lines[i]
+            post_lines[i] = '  '+str(ln+1+i).ljust(line_num_len+2) + post_lines[i]
             
         return prev_lines+post_lines+cur_lines
     
@@ -2,58 +2,64 @@ from . import events
 
 @events.emits('change')
 class DelayedUpdater(events.EventMixin):
+    __slots__ = ('_dirty_self', '_dirty_children', '__weakref__')
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.__dirty_self = False
-        self.__dirty_children = False
+        self._dirty_self = False
+        self._dirty_children = False
 
     def update_if_needed(self):
-        if self.__dirty_self:
-            self._update()
-            self._mark_clean()
-        if self.__dirty_children:
-            self._update_children()
-            self._mark_children_clean()
+        # Walks the dirty part of the tree iteratively (depth first, parents
+        # before children); the (node, True) entries mark the point where all
+        # children of node were updated, so that it can be marked clean
+        stack = [(self, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                node._mark_children_clean()
+                continue
+            if node._dirty_self:
+                node._update()
+                node._mark_clean()
+            if node._dirty_children:
+                stack.append((node, True))
+                stack.extend((ch, False) for ch in reversed(getattr(node, '_children', ())))
 
     @property
     def is_dirty(self):
-        return self.__dirty_self or self.__dirty_children
+        return self._dirty_self or self._dirty_children
 
     @property
     def is_clean(self):
-        return not self.__dirty_self and not self.__dirty_children
+        return not self._dirty_self and not self._dirty_children
 
     def _child_change_handler(self, evt):
-        if self.__dirty_self or self.__dirty_children:
+        if self._dirty_self or self._dirty_children:
             return
-        self.__dirty_children = True
+        self._dirty_children = True
         self.emit('change', {})
 
     def _change_handler(self, evt):
-        if self.__dirty_self:
+        if self._dirty_self:
             return
-        self.__dirty_self = True
-        if not self.__dirty_children:
+        self._dirty_self = True
+        if not self._dirty_children:
             self.emit('change', {})
 
     def _mark_dirty(self):
-        self.__dirty_self = True
+        self._dirty_self = True
 
     def _mark_clean(self):
-        self.__dirty_self = False
+        self._dirty_self = False
 
     def _mark_children_dirty(self):
-        self.__dirty_children = True
+        self._dirty_children = True
 
     def _mark_children_clean(self):
-        self.__dirty_children = False
+        self._dirty_children = False
 
     def _update(self):
         pass
 
-    def _update_children(self):
-        children = getattr(self, '_children', [])
-        for ch in children:
-            ch.update_if_needed()
-
 
@@ -53,20 +53,12 @@ class Event:
         return "<Event "+repr(self.names)+" target:"+repr(self.targets)+"; data:"+repr(self.data)+">"
 
 
-def add_event_mixin(obj):
-    """Apply mixins to a class instance after creation"""
-    # pylint: disable=protected-access
-    base_cls = obj.__class__
-    base_cls_name = obj.__class__.__name__
-    obj.__class__ = type(base_cls_name, (EventMixin, base_cls), {})
-    obj._event_handlers = {}
-
-
 class EventMixin:
     """
         A Mixin class which adds methods to an object to make it possible
         for it to emit events and for others to bind to its emitted events
     """
+    __slots__ = ('_event_handlers', '_forwarding_from_objects')
 
     def __init__(self, *args, **kwargs):
         self._event_handlers = {}
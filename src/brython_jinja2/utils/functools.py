@@ -1,8 +1,14 @@
 import asyncio
+import functools
+import types
 
 def decorator(dec):
+    @functools.wraps(dec)
     def new_dec(func):
         ret = dec(func)
+        # Wrapper functions get the name, docstring, ... of the function they wrap
+        if ret is not func and isinstance(ret, types.FunctionType) and not hasattr(ret, '__wrapped__'):
+            functools.update_wrapper(ret, func)
         ret.__decorated = func # pylint: disable=W0212
         return ret
     return new_dec
@@ -77,12 +83,21 @@ def factory(cls):
         self.ACTIVE = {k:v for k, v in self.AVAILABLE.items() if cond(k)}
 
     def create(self, name, *args, **kwargs):
-        constr = self.ACTIVE[name]
-        return constr(*args, **kwargs)
+        return self.ACTIVE[name](*args, **kwargs)
+
+    def specialize(self, name):
+        """
+            Returns the constructor of the product `name`, so that callers
+            creating many products of the same kind look it up only once.
+        """
+        return self.ACTIVE[name]
 
     cls.AVAILABLE = {}
-    cls.register = register
+    # Until _filter is called, all products are active
+    cls.ACTIVE = cls.AVAILABLE
+    cls.register = classmethod(register)
     cls.create = create
+    cls.specialize = specialize
     cls._filter = _filter # pylint: disable=W0212
 
     return cls
@@ -96,16 +111,21 @@ def throttle(sec: float):
     """
     @decorator
     def throttle_decorator(func):
-        _throttle = False
+        waiting = False
 
-        @asyncio.coroutine
-        def decorated(*args, **kwargs):
-            if _throttle:
+        @functools.wraps(func)
+        async def decorated(*args, **kwargs):
+            nonlocal waiting
+            if waiting:
                 return
-            _throttle = True
-            yield asyncio.sleep(sec)
-            func(*args, **kwargs)
-            _throttle = False
+            waiting = True
+            try:
+                await asyncio.sleep(sec)
+                ret = func(*args, **kwargs)
+                if asyncio.iscoroutine(ret):
+                    await ret
+            finally:
+                waiting = False
 
         return decorated
 
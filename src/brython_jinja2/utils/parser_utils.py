@@ -1,133 +1,122 @@
+import re
+import warnings
+
+
+# The characters of the skip argument of skip_chars and the match method
+# of a regexp matching runs of them, keyed by the (hashable) argument
+_SKIP_RE = {}
+
+# The number of characters skip_chars strips before using the regexp
+_SKIP_WINDOW = 32
+
+
+def _skip_re(skip):
+    # Only single characters can match string[pos], so longer
+    # items of skip are ignored
+    chars = ''.join(s for s in skip if len(s) == 1)
+    return chars, re.compile('[' + re.escape(chars) + ']*' if chars else '').match
 
 def skip_chars(string, pos, skip):
-    while string[pos] in skip:
-        pos += 1
+    # Stepping over short runs (the usual case) is cheaper than calling
+    # into C, medium ones are stripped from a short window and only long
+    # ones are handed to the regexp engine
+    if string[pos] not in skip:
+        return pos
+    if string[pos+1] not in skip:
+        return pos+1
+    if string[pos+2] not in skip:
+        return pos+2
+    try:
+        chars, match = _SKIP_RE[skip]
+    except KeyError:
+        chars, match = _SKIP_RE[skip] = _skip_re(skip)
+    except TypeError:
+        # Unhashable skip (e.g. a list)
+        chars, match = _skip_re(skip)
+    pos += 3
+    window = string[pos:pos+_SKIP_WINDOW]
+    rest = window.lstrip(chars)
+    if rest:
+        return pos+len(window)-len(rest)
+    pos = match(string, pos+len(window)).end()
+    if pos >= len(string):
+        raise IndexError("string index out of range")
     return pos
 
 def cat_until(string, pos, until):
-    ret = ''
+    if isinstance(until, str):
+        until = frozenset(until)
+    start = pos
     while string[pos] not in until:
-        ret += string[pos]
         pos += 1
-    return pos, ret
+    return pos, string[start:pos]
 
 def cat_while(string, pos, cond):
-    ret = ''
+    if isinstance(cond, str):
+        cond = frozenset(cond)
+    start = pos
     while string[pos] in cond:
-        ret += string[pos]
         pos += 1
-    return pos, ret
+    return pos, string[start:pos]
 
 
 class MultiMatcher:
     """
-       Python implementation of Aho-Corasick string matching
-       
-       Alfred V. Aho and Margaret J. Corasick, "Efficient string matching: an aid to
-       bibliographic search", CACM, 18(6):333-340, June 1975.
-       
-       <http://xlinux.nist.gov/dads//HTML/ahoCorasick.html>
-       
-       Copyright (C) 2015 Ori Livneh <ori@wikimedia.org>
-       
-       Licensed under the Apache License, Version 2.0 (the "License");
-       you may not use this file except in compliance with the License.
-       You may obtain a copy of the License at
-       
-           http://www.apache.org/licenses/LICENSE-2.0
-       
-       Unless required by applicable law or agreed to in writing, software
-       distributed under the License is distributed on an "AS IS" BASIS,
-       WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
-       See the License for the specific language governing permissions and
-       limitations under the License.
-       
+       Finds the first occurence of any of a set of strings (needles) in a string.
+
+       A single needle is searched for using :meth:`str.find`, otherwise the search
+       is delegated to a regexp alternation of the needles. The leftmost occurence
+       is returned, preferring the longest needle starting there.
+
+       Deprecated:
+           Nothing in the package uses the class any more; it is kept for
+           backwards compatibility only and will be removed.
+
        Example:
-       
+
             matcher = MultiMatcher(['token','end'])
-            
+
             pos, match = matcher.find('this is a token and this is the end')
             assert pos == 10 and match == 'token'
-            
+
             pos, match = matcher.find('this is a token and this is the end', pos+1)
-            assert pos == 32 and match == 'end'   
+            assert pos == 32 and match == 'end'
     """
-    _FAIL = -1
-    
+
     def __init__(self, needles):
         """
-            Constructs a state machine which searches a string for needles.
-            
+            Constructs a matcher which searches a string for needles.
+
             Args:
               needles (list[str]): the list of strings to search for
         """
-        self.transitions = {}
-        self.outputs = {}
-        self.fails = {}
-
-        new_state = 0
-
-        for needle in needles:
-            state = 0
-
-            for j, char in enumerate(needle):
-                res = self.transitions.get((state, char), self._FAIL)
-                if res == self._FAIL:
-                    break
-                state = res
-
-            for char in needle[j:]:
-                new_state += 1
-                self.transitions[(state, char)] = new_state
-                state = new_state
-
-            self.outputs[state] = [needle]
-
-        queue = []
-        for (from_state, char), to_state in self.transitions.items():
-            if from_state == 0 and to_state != 0:
-                queue.append(to_state)
-                self.fails[to_state] = 0
-
-        while queue:
-            r = queue.pop(0)
-            for (from_state, char), to_state in self.transitions.items():
-                if from_state == r:
-                    queue.append(to_state)
-                    state = self.fails[from_state]
-
-                    while True:
-                        res = self.transitions.get((state, char), state and self._FAIL)
-                        if res != self._FAIL:
-                            break
-                        state = self.fails[state]
-
-                    failure = self.transitions.get((state, char), state and self._FAIL)
-                    self.fails[to_state] = failure
-                    self.outputs.setdefault(to_state, []).extend(
-                        self.outputs.get(failure, []))
-        
+        warnings.warn("MultiMatcher is deprecated and will be removed", DeprecationWarning, stacklevel=2)
+        needles = list(needles)
+        # A single needle is searched for using str.find
+        self._needle = needles[0] if len(needles) == 1 else None
+        if needles:
+            # Longest first, so that the longest needle wins at a given position
+            self._re = re.compile('|'.join(re.escape(n) for n in sorted(needles, key=len, reverse=True)))
+        else:
+            self._re = None
+
     def find(self, haystack, start_pos=0):
         """
-            Uses the statemachine to find the first occurence of some needle in the `haystack`.
-            
+            Finds the first occurence of some needle in the `haystack`.
+
             Args:
                 haystack (str):  The string to search
                 start_pos (int): Start searching from the given position
-                
+
             Returns:
                 int, str: the position of the first occurence in haystack (or -1 if not found), the needle found (or None if not found)
         """
-        state = 0
-        for i, char in enumerate(haystack[start_pos:]):
-            while True:
-                res = self.transitions.get((state, char), state and self._FAIL)
-                if res != self._FAIL:
-                    state = res
-                    break
-                state = self.fails[state]
-
-            for match in self.outputs.get(state, ()):
-                pos = i - len(match) + 1
-                return (pos+start_pos, match)
-        return (-1, None)
+        if self._needle is not None:
+            pos = haystack.find(self._needle, start_pos)
+            return (pos, self._needle if pos != -1 else None)
+        if self._re is None:
+            return (-1, None)
+        match = self._re.search(haystack, start_pos)
+        if match is None:
+            return (-1, None)
+        return (match.start(), match.group())
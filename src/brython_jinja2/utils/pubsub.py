@@ -5,7 +5,12 @@
     handlers for different events which are triggered by the :method:`emit`
     method.
 """
-from ..platform.typing import List, Dict, Optional, Tuple, Iterable, Callable, Union, TypeVar, cast
+import weakref
+
+from collections import OrderedDict
+from itertools import count
+
+from ..platform.typing import Any, FrozenSet, List, Dict, Optional, Tuple, Iterable, Callable, Union, TypeVar, cast
 
 class PubSubError(Exception):
     pass
@@ -22,17 +27,18 @@ class Message:
         and message specific info (publishers, whether it was processed,
         message id...)
     """
-    _lastid = 0
+    __slots__ = ('publishers', 'channels', 'data', 'processed', 'messageid')
+
+    # Message ids (wrapped to 31 bits, see __init__)
+    _ids = count()
 
     def __init__(self, channel: ChannelT, publisher: PublisherT, data=None) -> None:
         self.publishers = [publisher] # type: List[PublisherT]
         self.channels = [channel]     # type: List[ChannelT]
         self.data = data
         self.processed = False
-        self.messageid = Message._lastid
-        Message._lastid += 1
-        if Message._lastid > 2**31:
-            Message._lastid = 0
+        # Keep the ids small (Brython represents small ints as JS numbers)
+        self.messageid = next(Message._ids) & 0x7FFFFFFF
 
     def republish(self, tgt: PublisherT) -> None:
         self.publishers.append(tgt)
@@ -62,9 +68,45 @@ class PublisherMixin:
         for it to emit events and for others to bind to its emitted events
     """
 
+    # The channels the publisher provides (see :func:`provides_channels`),
+    # empty if any channel can be used
+    _channels = frozenset() # type: FrozenSet[ChannelT]
+
     def __init__(self):
-        self._subscribers = {}      # type: Dict[ChannelT, List[SubscriberT]]
-        self._aggregating_from = [] # type: List[Tuple['PublisherMixin', SubscriberT, ChannelT]]
+        # The subscribers of each channel, kept as the keys of an ordered
+        # dict (an ordered set), so that unsubscribing does not scan a list
+        self._subscribers = {}      # type: Dict[ChannelT, Dict[SubscriberT, None]]
+        # The publishers forwarding to us (weakly referenced, so that we
+        # don't keep them alive), the forwarding subscribers and the channels
+        self._aggregating_from = [] # type: List[Tuple[weakref.ref, SubscriberT, ChannelT]]
+        self._batch_depth = 0
+        self._pending = OrderedDict() # type: Dict[ChannelT, Any]
+
+    def batch(self, fn: Callable[[], Any]) -> Any:
+        """
+            Calls :param:`fn` (and returns its result) deferring the messages published
+            by the object in the meantime. When :param:`fn` returns, the subscribers
+            of each channel which was published to are notified once, with the
+            data of the last message published on the channel.
+
+            Batches may be nested, the messages are published when the outermost
+            batch ends. If :param:`fn` raises, the messages deferred by the outermost
+            batch are dropped, so that subscribers are not notified about partial state.
+        """
+        self._batch_depth += 1
+        try:
+            ret = fn()
+        except BaseException:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._pending = OrderedDict()
+            raise
+        self._batch_depth -= 1
+        if not self._batch_depth:
+            pending, self._pending = self._pending, OrderedDict()
+            for channel, message_data in pending.items():
+                self.pub(channel, message_data)
+        return ret
 
     def sub(self, channel: ChannelT, subscriber: Union[SubscriberT, PublisherT], forward_to: ChannelT = None) -> None:
         """
@@ -75,17 +117,19 @@ class PublisherMixin:
            (or :param:`channel` if :param:`forward_to` is None) of the :param`:subscriber.
         """
         # pylint: disable=protected-access
+        if self._channels and channel not in self._channels:
+            raise PubSubError("Unknown channel "+str(channel)+" (provided channels: "+str(sorted(self._channels))+")")
         if  isinstance(subscriber, PublisherMixin):
             if forward_to is None:
                 forward_to = channel
             generated_subscriber = generate_forwarding_subscriber(subscriber, forward_to)
-            subscriber._aggregating_from.append((self, generated_subscriber, channel))
+            subscriber._aggregating_from.append((weakref.ref(self), generated_subscriber, channel))
             subscriber = generated_subscriber
 
         if channel not in self._subscribers:
-            self._subscribers[channel] = []
+            self._subscribers[channel] = OrderedDict()
 
-        self._subscribers[channel].append(cast(SubscriberT, subscriber))
+        self._subscribers[channel][cast(SubscriberT, subscriber)] = None
 
     def stop_forwarding(self, restrict_to_channel: ChannelT = None, restrict_to_publisher: 'PublisherMixin' = None) -> None:
         """
@@ -97,13 +141,16 @@ class PublisherMixin:
            2. If :param:`restrict_to_publisher` is ``None`` the rule is satisfied. Otherwise the message
            satisfies the rule if it was published by the :param:`restrict_to_publisher` publisher.
         """
-        retain = []  # type: List[Tuple['PublisherMixin', SubscriberT, ChannelT]]
-        for (publisher, subscriber, channel) in self._aggregating_from:
+        retain = []  # type: List[Tuple[weakref.ref, SubscriberT, ChannelT]]
+        for (publisher_ref, subscriber, channel) in self._aggregating_from:
+            publisher = publisher_ref()
+            if publisher is None:
+                continue
             if (restrict_to_channel is None or channel == restrict_to_channel) and (
                     restrict_to_publisher is None or publisher == restrict_to_publisher):
                 publisher.unsub(channel, subscriber)
             else:
-                retain.append((publisher, subscriber, channel))
+                retain.append((publisher_ref, subscriber, channel))
         self._aggregating_from = retain
 
     def unsub(self, channel: ChannelT = None, subscriber: SubscriberT = None) -> None:
@@ -119,15 +166,19 @@ class PublisherMixin:
         """
         if channel is None:
             self._subscribers = {}
-            for (publisher, subscriber, channel) in self._aggregating_from:
-                publisher.unsub(channel, subscriber)
+            for (publisher_ref, subscriber, channel) in self._aggregating_from:
+                publisher = publisher_ref()
+                if publisher is not None:
+                    publisher.unsub(channel, subscriber)
             self._aggregating_from = []
         else:
-            subscribers = self._subscribers.get(channel, [])
+            subscribers = self._subscribers.get(channel, {})
             if subscriber is None:
                 subscribers.clear()
+            elif subscriber in subscribers:
+                del subscribers[subscriber]
             else:
-                subscribers.remove(subscriber)
+                raise ValueError("Not subscribed to "+str(channel)+": "+repr(subscriber))
 
     def pub(self, channel, message_data=None, _forwarded=False):
         """
@@ -145,16 +196,37 @@ class PublisherMixin:
         if _forwarded and isinstance(message_data, Message):
             message_data.republish(self)
             message_data.add_channel(channel)
+            subscribers = self._subscribers.get(channel)
+        elif self._batch_depth:
+            self._pending[channel] = message_data
+            return
         else:
+            subscribers = self._subscribers.get(channel)
+            if not subscribers:
+                # Nobody is listening, don't bother creating the message
+                return
             message_data = Message(channel, self, message_data)
-            subscribers = self._subscribers.get(channel, [])
-            for subscriber in subscribers:
+        if subscribers:
+            # Iterate over a copy, subscribers may unsubscribe
+            for subscriber in list(subscribers):
                 subscriber(message_data)
 
+class _Forwarder:
+    """
+        A subscriber which forwards the messages it receives to
+        the `channel` channel of `publisher`.
+    """
+    __slots__ = ('publisher', 'channel')
+
+    def __init__(self, publisher: PublisherMixin, channel: ChannelT) -> None:
+        self.publisher = publisher
+        self.channel = channel
+
+    def __call__(self, message: Message) -> None:
+        self.publisher.pub(self.channel, message, _forwarded=True)
+
 def generate_forwarding_subscriber(publisher: PublisherMixin, forward_to_channel: str):
-    def subscriber(message):
-        publisher.pub(forward_to_channel, message, _forwarded=True)
-    return subscriber
+    return _Forwarder(publisher, forward_to_channel)
 
 def add_publisher_mixin(obj):
     """Apply mixins to a class instance after creation"""
@@ -162,15 +234,20 @@ def add_publisher_mixin(obj):
     base_cls = obj.__class__
     base_cls_name = obj.__class__.__name__
     obj.__class__ = type(base_cls_name, (PublisherMixin, base_cls), {})
-    obj._subscribers = {}
+    PublisherMixin.__init__(obj)
 
 
 
 def provides_channels(*args):
+    """
+        A class decorator declaring the channels the (:class:`PublisherMixin` subclass)
+        publishes to, in addition to the channels declared for its base classes.
+        Subscribing to other channels raises a :class:`PubSubError`.
+    """
     def decorator(cls):
         if not issubclass(cls, PublisherMixin):
             raise PubSubError("Class "+str(cls)+" is not an PublisherMixin subclass, cannot publish messages!")
-        cls.__channels = args
+        cls._channels = cls._channels.union(args)
         return cls
     return decorator
 
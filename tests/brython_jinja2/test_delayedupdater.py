@@ -0,0 +1,52 @@
+from brython_jinja2.utils.delayedupdater import DelayedUpdater
+
+
+class Updater(DelayedUpdater):
+    def __init__(self, name, log, children=()):
+        super().__init__()
+        self.name = name
+        self.log = log
+        self._children = list(children)
+        for ch in self._children:
+            ch.bind('change', self._child_change_handler)
+
+    def _update(self):
+        self.log.append(self.name)
+
+
+def test_update_if_needed():
+    log = []
+    leaves = [Updater('leaf'+str(i), log) for i in range(3)]
+    mid = Updater('mid', log, leaves[:2])
+    root = Updater('root', log, [mid, leaves[2]])
+
+    events = []
+    root.bind('change', lambda ev: events.append(ev))
+
+    leaves[1]._change_handler(None)
+    leaves[2]._change_handler(None)
+    mid._change_handler(None)
+    assert len(events) == 1
+    assert root.is_dirty
+
+    root.update_if_needed()
+    assert log == ['mid', 'leaf1', 'leaf2']
+    assert all(n.is_clean for n in [root, mid]+leaves)
+
+    leaves[0]._change_handler(None)
+    assert len(events) == 2
+    root.update_if_needed()
+    assert log[-1] == 'leaf0'
+
+
+def test_deep_update():
+    # Deeper than the recursion limit; the dirty flags are set directly
+    # since the change events propagate recursively
+    log = []
+    node = leaf = Updater('leaf', log)
+    leaf._mark_dirty()
+    for i in range(5000):
+        node = Updater(str(i), log, [node])
+        node._mark_children_dirty()
+    node.update_if_needed()
+    assert log == ['leaf']
@@ -6,12 +6,6 @@ import brython_jinja2.expression as exp
 from brython_jinja2.context import Context, Immutable
 
 
-def test_parse_number():
-    assert exp.parse_number(" 123.5.6", 1) == (123.5, 6)
-    assert exp.parse_number(" 123.5z", 1) == (123.5, 6)
-    assert exp.parse_number(" -123.5z", 1) == (-123.5, 7)
-
-
 def test_parse_string():
     assert exp.parse_string("'ahoj\\''", 0) == ("ahoj\'", 8)
     assert exp.parse_string('"123456"', 0) == ("123456", 8)
@@ -214,6 +208,11 @@ def test_parse_interpolated_string():
     val = "".join([ast.evalctx(ctx) for ast in asts])
     assert val == 'Test text {{{{}}{}{}}} other }}'
 
+    # Identical text fragments share a single ConstNode
+    _, asts_a = exp.parse_interpolated_str('Test text {{ 1 }}')
+    _, asts_b = exp.parse_interpolated_str('Test text {{ 2 }}')
+    assert asts_a[0] is asts_b[0]
+
 
 def test_parse():
     ctx = Context()
@@ -350,6 +349,76 @@ def test_parse():
         assert ast.evalctx(ctx) == [-1, -5]
 
 
+def test_parse_cache():
+    exp.parse.cache_clear()
+    ast, _ = exp.parse('a+1')
+    assert ('a+1', False) in exp._PARSE_CACHE
+    ctx = Context()
+    ctx.a = 1
+    ast.bind_ctx(ctx)
+
+    # Cache hits return fresh (unbound) clones
+    cached, _ = exp.parse('a+1')
+    assert cached is not ast
+    ctx2 = Context()
+    ctx2.a = 10
+    assert cached.evalctx(ctx2) == 11
+    assert ast.value == 2
+
+    exp.parse.cache_clear()
+    assert len(exp._PARSE_CACHE) == 0
+
+
+def test_const_slice():
+    ast, _ = exp.parse('lst[1:3]')
+    assert isinstance(ast._rarg, exp.ConstSliceNode)
+    assert ast._rarg.clone() is ast._rarg
+    ctx = Context()
+    ctx.lst = [1, 2, 3, 4]
+    ast.bind_ctx(ctx)
+    assert ast.value == [2, 3]
+    ctx.lst = [5, 6, 7]
+    assert ast.value == [6, 7]
+
+    ast, _ = exp.parse('lst[a:3]')
+    assert not isinstance(ast._rarg, exp.ConstSliceNode)
+
+
+def test_compile():
+    ctx = Context()
+    ctx.s = "abcde"
+    ctx.lst = [1, 2, 3]
+    ctx.obj = Context()
+    ctx.obj.a = 10
+    ctx.func = lambda x, ev: str(x+10)+ev
+
+    for expr in ['(1+1*8)*9', 's[0:-1:2]', 's[-1]', 'obj.a * 2', 'func(obj.a, ev=s)',
+                 '[[x+y for x in lst] for y in lst if y % 2 == 1]', 'len(lst) is not None', '1 in lst']:
+        ast, _ = exp.parse(expr)
+        # Compilation is deferred until the first evalctx call
+        assert ast._compiled is None
+        assert ast.evalctx(ctx) == ast._evalctx(ctx)
+        assert ast._compiled
+
+    # The comprehension variable must not leak into the context
+    ast, _ = exp.parse('[p for p in lst]')
+    ctx.p = 'p'
+    assert ast.evalctx(ctx) == [1, 2, 3]
+    assert ctx.p == 'p'
+
+
+def test_compile_short_circuit():
+    ctx = Context()
+    ctx.n = None
+    ctx.lst = [1]
+
+    for expr, expected in [('n is not None and n.a', False), ('n and n.a', None), ('lst or n.a', [1])]:
+        ast, _ = exp.parse(expr)
+        assert ast.evalctx(ctx) == expected
+        assert ast._compiled is not None
+        assert ast._evalctx(ctx) == expected
+
+
 def test_is_func():
     ast, _ = exp.parse('(1+1*x)*9')
     assert ast.is_function_call() is False
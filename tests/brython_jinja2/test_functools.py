@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from brython_jinja2.utils.functools import factory, pure, self_generator, throttle
+
+
+def test_throttle():
+    calls = []
+
+    @throttle(0.01)
+    def f(x):
+        calls.append(x)
+
+    async def run():
+        await asyncio.gather(f(1), f(2), f(3))
+        await f(4)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+    assert calls == [1, 4]
+    assert f.__name__ == 'f'
+
+
+def test_factory():
+    @factory
+    class Shapes:
+        pass
+
+    @Shapes.register('square')
+    class Square:
+        def __init__(self, side):
+            self.side = side
+
+    shapes = Shapes()
+    assert shapes.create('square', 2).side == 2
+    make_square = shapes.specialize('square')
+    assert make_square(3).side == 3
+
+    shapes._filter(lambda name: name != 'square')
+    with pytest.raises(KeyError):
+        shapes.create('square', 2)
+
+
+def test_decorator_metadata():
+    @self_generator
+    def gen(self):
+        """A generator"""
+        yield 1
+
+    assert gen.__name__ == 'gen'
+    assert gen.__doc__ == "A generator"
+    assert list(gen()) == [1]
+    assert pure.__name__ == 'pure'
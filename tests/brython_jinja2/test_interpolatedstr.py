@@ -1,3 +1,6 @@
+from unittest.mock import patch
+
+import brython_jinja2.interpolatedstr as interpolatedstr
 from brython_jinja2.interpolatedstr import InterpolatedStr
 from brython_jinja2.context import Context
 from tests.utils import TObserver
@@ -14,6 +17,10 @@ def test_string_interp():
     data = t.events.pop().data
     assert s.value == "My name is Bond, James Bond."
 
+    # Only the changed expressions should be reevaluated
+    ctx.surname = "Bend"
+    assert s.value == "My name is Bend, James Bend."
+
     # Should correctly interpolate two immediately succeeding expressions
     ctx.sur="B"
     s = InterpolatedStr('{{name}}{{sur}}')
@@ -28,3 +35,45 @@ def test_string_interp():
 
 
 
+
+
+def test_cached_parse():
+    ctx_a = Context()
+    ctx_a.name = "A"
+    ctx_b = Context()
+    ctx_b.name = "B"
+    s = InterpolatedStr("Hi {{ name }}  ")
+    t = InterpolatedStr("Hi {{ name }}  ")
+    s.bind_ctx(ctx_a)
+    t.bind_ctx(ctx_b)
+    assert s.value == "Hi A  "
+    assert t.value == "Hi B  "
+
+    # Stripping a clone must not modify strings sharing the cached parse
+    r = s.rstrip()
+    r.bind_ctx(ctx_a)
+    assert r.value == "Hi A"
+    assert t.value == "Hi B  "
+    assert InterpolatedStr("Hi {{ name }}  ").value == "Hi   "
+
+
+def test_cache_size():
+    InterpolatedStr.cache_clear()
+    assert len(interpolatedstr._INTERP_CACHE) == 0
+    with patch('brython_jinja2.interpolatedstr._INTERP_CACHE_SIZE', 2):
+        InterpolatedStr("{{ a }}")
+        InterpolatedStr("{{ b }}")
+        InterpolatedStr("{{ a }}")
+        InterpolatedStr("{{ c }}")
+    # The least recently used string was dropped
+    assert [key[0] for key in interpolatedstr._INTERP_CACHE] == ["{{ a }}", "{{ c }}"]
+    InterpolatedStr.cache_clear()
+    assert len(interpolatedstr._INTERP_CACHE) == 0
+
+
+def test_const():
+    ctx = Context()
+    s = InterpolatedStr("Plain text {{ 1 }}")
+    assert s.is_const()
+    s.bind_ctx(ctx)
+    assert s.value == "Plain text 1"
@@ -35,3 +35,10 @@ def test_comment():
     assert toks[1][:2] == (l.T_COMMENT_END, '#}')
     assert toks[2][0] == l.T_EOS
     
+
+def test_longest_token_wins():
+    ts = TokenStream('<!--<', tmap=[(l.T_HTML_ELEMENT_START, '<'), (l.T_HTML_COMMENT_START, '<!--')])
+    toks = list(ts)
+    assert toks[0][:2] == (l.T_HTML_COMMENT_START, '<!--')
+    assert toks[1][:2] == (l.T_HTML_ELEMENT_START, '<')
+    assert toks[2][0] == l.T_EOS
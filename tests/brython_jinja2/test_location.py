@@ -21,6 +21,12 @@ def test_location_from_pos():
     assert loc.line == 3
     assert loc.column == 11
     assert loc.pos == src.find("AHOJ")
+
+    loc = Location.location_from_pos(src=src, pos=0)
+    assert (loc.line, loc.column, loc.pos) == (0, 0, 0)
+
+    loc = Location.location_from_pos(src=src, pos=src.find("\n")+1)
+    assert (loc.line, loc.column) == (1, 0)
     
 def test_location_context():
     loc = Location.location_from_pos(src=src, pos=src.find("AHOJ"))
@@ -40,3 +46,17 @@ def test_location_context():
     assert len(ctx) == 2+len(src.split('\n'))
     ctx = loc.context(num_ctx_lines = 2)
     assert len(ctx) == 7
+
+def test_location_context_trailing_newline():
+    loc = Location.location_from_pos(src="a\nb\n", pos=4)
+    assert loc.line == 2
+    assert loc.context(num_ctx_lines=1)[-2] == '> 2'
+    assert loc.clone().context(num_ctx_lines=1) == loc.context(num_ctx_lines=1)
+
+def test_location_context_window():
+    loc = Location.location_from_pos(src="a\nb\nc\nd", pos=2)
+    assert loc.context(num_ctx_lines=1) == ['  0  a', '  2  c', '', '> 1b', '   ^']
+
+def test_location_context_without_pos():
+    loc = Location(src="a\nb\nc\nd", ln=2, col=0)
+    assert loc.context(num_ctx_lines=1) == ['  1  b', '  3  d', '', '> 2c', '   ^']
@@ -0,0 +1,88 @@
+import pytest
+
+from brython_jinja2.utils.parser_utils import MultiMatcher, cat_until, cat_while, skip_chars
+
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_multimatcher():
+    src = 'this is a token and this is the end'
+    for matcher in [MultiMatcher(['token', 'end']), MultiMatcher(['token', 'end']+['x'*i+'y' for i in range(100)])]:
+        pos, match = matcher.find(src)
+        assert pos == 10 and match == 'token'
+
+        pos, match = matcher.find(src, pos+1)
+        assert pos == 32 and match == 'end'
+
+        assert matcher.find(src, pos+1) == (-1, None)
+
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_multimatcher_longest():
+    matcher = MultiMatcher(['{', '{{', '{%'])
+    assert matcher.find('a {{ b') == (2, '{{')
+    assert matcher.find('a {% b') == (2, '{%')
+    assert matcher.find('a { b') == (2, '{')
+    assert MultiMatcher([]).find('abc') == (-1, None)
+
+
+def test_cat():
+    assert cat_until('abc def', 1, ' ') == (3, 'bc')
+    assert cat_until('abc def', 0, ['d', ' ']) == (3, 'abc')
+    assert cat_while('aab', 0, 'a') == (2, 'aa')
+    assert cat_while('aab', 2, 'a') == (2, '')
+    with pytest.raises(IndexError):
+        cat_until('abc', 0, 'x')
+
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_multimatcher_prefix_needles():
+    many = ['x'*i+'y' for i in range(100)]
+    for needles in [['token', 'tok'], ['tok', 'token']]:
+        matcher = MultiMatcher(needles+many)
+        assert matcher.find('a tok') == (2, 'tok')
+        assert matcher.find('a toke') == (2, 'tok')
+
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_multimatcher_overlapping():
+    # Needles not occuring in the haystacks
+    filler = ['z'*i+'q' for i in range(100)]
+    cases = [
+        (['bc', 'abcd'], 'xabcd', (1, 'abcd')),
+        (['bc', 'abcd'], 'xabce', (2, 'bc')),
+        (['b', 'ab', 'abc'], 'aabcd', (1, 'abc')),
+        (['cd', 'bcdef', 'abc'], 'abcdef', (0, 'abc')),
+        (['cd', 'bcdef', 'abc'], 'xbcdef', (1, 'bcdef')),
+    ]
+    for needles, haystack, expected in cases:
+        small, large = MultiMatcher(needles), MultiMatcher(needles+filler)
+        assert small.find(haystack) == large.find(haystack) == expected
+
+
+def test_skip_chars():
+    assert skip_chars('  \tab', 0, ' \t') == 3
+    assert skip_chars('  \tab', 0, [' ']) == 2
+    assert skip_chars('  \tab', 1, frozenset(' \t')) == 3
+    assert skip_chars('ab', 0, ' ') == 0
+    with pytest.raises(IndexError):
+        skip_chars('  ', 0, ' ')
+
+    # Runs longer than the window stripped before using the regexp
+    for n in [5, 40, 300]:
+        assert skip_chars(' \t'*n+'ab', 1, ' \t') == 2*n
+        assert skip_chars(' \t'*n+'ab', 1, [' ', '\t', 'ab']) == 2*n
+        with pytest.raises(IndexError):
+            skip_chars(' '*n, 0, frozenset(' '))
+
+
+@pytest.mark.filterwarnings('ignore::DeprecationWarning')
+def test_multimatcher_single_needle():
+    matcher = MultiMatcher(['#}'])
+    assert matcher.find('a #} b #}') == (2, '#}')
+    assert matcher.find('a #} b #}', 3) == (7, '#}')
+    assert matcher.find('a # } b') == (-1, None)
+
+
+def test_multimatcher_deprecated():
+    with pytest.deprecated_call():
+        MultiMatcher(['a', 'b'])
@@ -0,0 +1,140 @@
+import gc
+import weakref
+
+import pytest
+
+from brython_jinja2.utils.pubsub import PublisherMixin, PubSubError, provides_channels
+
+
+def test_pub_sub():
+    pub = PublisherMixin()
+    received = []
+    pub.sub('chan', lambda msg: received.append((msg.channel, msg.data)))
+    pub.pub('chan', 10)
+    pub.pub('other', 20)
+    assert received == [('chan', 10)]
+
+
+def test_batch():
+    pub = PublisherMixin()
+    received = []
+    pub.sub('a', lambda msg: received.append(('a', msg.data)))
+    pub.sub('b', lambda msg: received.append(('b', msg.data)))
+
+    def publish():
+        pub.pub('a', 1)
+        pub.pub('b', 2)
+        pub.batch(lambda: pub.pub('a', 3))
+        assert received == []
+        return 'ret'
+
+    assert pub.batch(publish) == 'ret'
+    assert received == [('a', 3), ('b', 2)]
+
+    pub.pub('a', 4)
+    assert received[-1] == ('a', 4)
+
+
+def test_batch_raises():
+    pub = PublisherMixin()
+    received = []
+    pub.sub('a', lambda msg: received.append(msg.data))
+
+    def fail():
+        pub.pub('a', 1)
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        pub.batch(fail)
+    assert received == []
+
+    # A failed nested batch is dropped together with the outermost one
+    def outer():
+        pub.pub('a', 2)
+        pub.batch(fail)
+
+    with pytest.raises(ValueError):
+        pub.batch(outer)
+    assert received == []
+
+    pub.batch(lambda: pub.pub('a', 3))
+    assert received == [3]
+
+
+class Subscriber:
+    def __init__(self):
+        self.received = []
+
+    def handler(self, msg):
+        self.received.append(msg.data)
+
+
+def test_unsub():
+    pub = PublisherMixin()
+    subs = [Subscriber() for _ in range(3)]
+    for sub in subs:
+        pub.sub('chan', sub.handler)
+    pub.unsub('chan', subs[1].handler)
+    pub.pub('chan', 1)
+    assert [sub.received for sub in subs] == [[1], [], [1]]
+
+    with pytest.raises(ValueError):
+        pub.unsub('chan', subs[1].handler)
+
+    pub.unsub('chan')
+    pub.pub('chan', 2)
+    assert subs[0].received == [1]
+
+
+def test_forwarding_weakref():
+    upstream = PublisherMixin()
+    other = PublisherMixin()
+    downstream = PublisherMixin()
+    upstream.sub('chan', downstream)
+    other.sub('chan', downstream)
+    assert len(downstream._aggregating_from) == 2
+
+    # The downstream publisher does not keep upstream alive
+    upstream_ref = weakref.ref(upstream)
+    del upstream
+    gc.collect()
+    assert upstream_ref() is None
+
+    downstream.stop_forwarding(restrict_to_publisher=other)
+    assert downstream._aggregating_from == []
+    assert not other._subscribers['chan']
+
+
+def test_provides_channels():
+    @provides_channels('a', 'b')
+    class Pub(PublisherMixin):
+        pass
+
+    @provides_channels('c')
+    class SubPub(Pub):
+        pass
+
+    assert Pub._channels == frozenset(['a', 'b'])
+    assert SubPub._channels == frozenset(['a', 'b', 'c'])
+
+    pub = SubPub()
+    pub.sub('c', lambda msg: None)
+    with pytest.raises(PubSubError):
+        pub.sub('d', lambda msg: None)
+    with pytest.raises(PubSubError):
+        Pub().sub('c', lambda msg: None)
+
+
+def test_forwarding():
+    upstream = PublisherMixin()
+    downstream = PublisherMixin()
+    received = []
+    downstream.sub('out', lambda msg: received.append((msg.channels, msg.data)))
+    upstream.sub('in', downstream, forward_to='out')
+
+    upstream.pub('in', 10)
+    assert received == [(['in', 'out'], 10)]
+
+    downstream.stop_forwarding()
+    upstream.pub('in', 20)
+    assert len(received) == 1
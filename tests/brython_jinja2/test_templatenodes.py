@@ -58,6 +58,12 @@ def test_if_node():
     assert str(cases[2][0]) == 'True'
     assert cases[2][1][0]._content == "OTHER"
     
+    TPL = "{% if x == 10 %}10{% endif %}AFTER"
+    parser = Parser()
+    tpl = parser.parse(TPL, 'test_if_node.5', 'test_templatenodes.py')
+    assert len(tpl) == 2
+    assert tpl[1]._content == "AFTER"
+
     TPL = "{% if x == 10 %} 10 {% else %}20{% else %}OTHER{% endif %}"
     parser = Parser()
     with pytest.raises(TemplateSyntaxError):
@@ -75,3 +81,45 @@ def test_if_node():
     with pytest.raises(TemplateSyntaxError):
         tpl = parser.parse(TPL, 'test_if_node.4', 'test_templatenodes.py')
         
+
+def test_html_segments():
+    parser = MockParser()
+    tokenstream = parser.env._tokenize("text {{", 'test_html_segments')
+    node = nodes.Node(parser, tokenstream)
+    content = nodes.Content(parser, tokenstream, tokenstream.loc)
+    assert content._get_html_segments() == [("text ", None)]
+    node._children = [content, content]
+    assert node._get_html_segments() == [(None, 0), (None, 1)]
+    assert node._get_html_content() == nodes.Node._html_ref(0)+nodes.Node._html_ref(1)
+    assert nodes.Node._extract_id(nodes.Node._html_ref(12)) == 12
+
+def test_render_dom_plain_text():
+    parser = MockParser()
+    tokenstream = parser.env._tokenize("text {{", 'test_render_dom_plain_text')
+    node = nodes.Node(parser, tokenstream)
+    content = nodes.Content(parser, tokenstream, tokenstream.loc)
+    assert content.render_dom() == ["text "]
+    node._children = [content, content]
+    assert node.render_dom() == ["text ", "text "]
+
+def test_unknown_tag():
+    parser = Parser()
+    with pytest.raises(TemplateSyntaxError):
+        parser.parse("{% nonexistent %}", 'test_unknown_tag', 'test_templatenodes.py')
+
+def test_templated_val_attr():
+    node_map = {0: 'n0', 1: 'n1'}
+    val = 'a '+nodes.Node._html_ref(0)+'b_c'+nodes.Node._html_ref(1)
+    attr = nodes._TemplatedValAttr(None, 'class', val, node_map)
+    assert attr._components == ['a ', 'n0', 'b_c', 'n1']
+
+
+def test_node_dirty_tracking():
+    parser = MockParser()
+    tokenstream = parser.env._tokenize("text {{", 'test_node_dirty_tracking')
+    node = nodes.Content(parser, tokenstream, tokenstream.loc)
+    assert node.is_clean
+    node._change_handler(None)
+    assert node.is_dirty
+    node.update_if_needed()
+    assert node.is_clean